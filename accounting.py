@@ -0,0 +1,246 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+# USD per 1K tokens: (prompt, completion)
+PRICING = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4o-mini': (0.00015, 0.0006),
+}
+DEFAULT_PRICE = PRICING['gpt-3.5-turbo']
+
+# Cheaper model used once a tenant or session passes its soft quota
+ECONOMY_MODEL = os.getenv("PATHFINDER_ECONOMY_MODEL", "gpt-4o-mini")
+
+DEFAULT_TENANT = "default"
+SYSTEM_TENANT = "system"
+
+logger = logging.getLogger(__name__)
+
+USAGE_DIR = os.getenv("PATHFINDER_USAGE_DIR", ".pathfinder_cache")
+
+# Quota states returned by UsageLedger.check()
+OK, SOFT, HARD = "ok", "soft", "hard"
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = PRICING.get(model, DEFAULT_PRICE)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+def _load_quotas() -> Dict[str, Dict[str, float]]:
+    """Daily USD quotas per tenant from PATHFINDER_QUOTAS, e.g. '{"acme": {"soft": 5, "hard": 10}}'"""
+    try:
+        return json.loads(os.getenv("PATHFINDER_QUOTAS", "{}"))
+    except ValueError:
+        return {}
+
+def resolve_tenant(access_token: Optional[str] = None) -> str:
+    """Tenant charged for a request, from server-side configuration only
+    
+    PATHFINDER_TENANT_TOKENS maps opaque access tokens to tenant ids, e.g.
+    '{"3f9c...": "acme"}'; unknown or missing tokens get PATHFINDER_TENANT.
+    """
+    try:
+        tokens = json.loads(os.getenv("PATHFINDER_TENANT_TOKENS", "{}"))
+    except ValueError:
+        tokens = {}
+    if access_token and access_token in tokens:
+        return tokens[access_token]
+    return os.getenv("PATHFINDER_TENANT", DEFAULT_TENANT)
+
+class UsageLedger:
+    """Token and cost totals per call, session and tenant
+    
+    Totals live in memory so check() is a couple of dict lookups; per-call
+    records are buffered and appended to a JSON Lines file at most every
+    `flush_interval` seconds, alongside a snapshot of tenant totals. Sessions
+    idle for `session_idle` seconds and past days' tenant totals are dropped
+    on the same schedule, so a long-running server's memory stays bounded.
+    """
+    
+    def __init__(self, usage_dir: str = USAGE_DIR, flush_interval: float = 30.0,
+                 tenant_quotas: Optional[Dict[str, Dict[str, float]]] = None,
+                 default_tenant_quota: Optional[Dict[str, float]] = None,
+                 session_quota: Optional[Dict[str, float]] = None, session_idle: float = 6 * 3600.0):
+        self.usage_dir = usage_dir
+        self.flush_interval = flush_interval
+        self.tenant_quotas = tenant_quotas if tenant_quotas is not None else _load_quotas()
+        self.default_tenant_quota = default_tenant_quota or {'soft': 5.0, 'hard': 10.0}
+        self.session_quota = session_quota or {'soft': 0.50, 'hard': 1.00}
+        # Seconds without calls after which a session's totals are dropped
+        self.session_idle = session_idle
+        
+        self._totals: Dict[tuple, Dict[str, float]] = defaultdict(
+            lambda: {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost': 0.0})
+        self._session_seen: Dict[str, float] = {}
+        self._buffer: List[Dict] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._load_snapshot()
+    
+    @property
+    def _records_path(self) -> str:
+        return os.path.join(self.usage_dir, "usage.jsonl")
+    
+    @property
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.usage_dir, "usage_totals.json")
+    
+    def _load_snapshot(self) -> None:
+        """Restore today's tenant totals so quotas survive a restart"""
+        try:
+            with open(self._snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+        if snapshot.get('day') == date.today().isoformat():
+            for tenant, totals in snapshot.get('tenants', {}).items():
+                self._totals[('tenant', tenant, snapshot['day'])].update(totals)
+    
+    def record(self, session_id: Optional[str], tenant_id: Optional[str], agent: str, method: str,
+               model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Add one call's usage to every aggregate; returns its estimated cost"""
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        tenant_id = tenant_id or SYSTEM_TENANT
+        today = date.today().isoformat()
+        
+        with self._lock:
+            keys = [('tenant', tenant_id, today)]
+            if session_id:
+                keys.append(('session', session_id))
+                self._session_seen[session_id] = time.monotonic()
+            for key in keys:
+                totals = self._totals[key]
+                totals['calls'] += 1
+                totals['prompt_tokens'] += prompt_tokens
+                totals['completion_tokens'] += completion_tokens
+                totals['cost'] += cost
+            self._buffer.append({
+                'timestamp': datetime.now().isoformat(), 'session': session_id, 'tenant': tenant_id,
+                'agent': agent, 'method': method, 'model': model,
+                'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens, 'cost': cost,
+            })
+            # Claim the flush under the lock so concurrent callers don't both run it
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+            if due:
+                self._last_flush = time.monotonic()
+                self._evict(today)
+        
+        if due:
+            self.flush()
+        return cost
+    
+    def _evict(self, today: str) -> None:
+        """Drop idle sessions and past days' tenant totals; caller holds the lock"""
+        cutoff = time.monotonic() - self.session_idle
+        for session_id in [s for s, seen in self._session_seen.items() if seen < cutoff]:
+            del self._session_seen[session_id]
+            self._totals.pop(('session', session_id), None)
+        for key in [k for k in self._totals if k[0] == 'tenant' and k[2] != today]:
+            del self._totals[key]
+    
+    def flush(self) -> None:
+        """Append buffered call records and rewrite the tenant totals snapshot
+        
+        I/O errors are logged, never raised: accounting must not fail an LLM
+        call whose answer has already been received. Unwritten records go back
+        into the buffer for the next flush.
+        """
+        today = date.today().isoformat()
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            tenants = {key[1]: dict(totals) for key, totals in self._totals.items()
+                       if key[0] == 'tenant' and key[2] == today}
+        
+        try:
+            os.makedirs(self.usage_dir, exist_ok=True)
+            if records:
+                with open(self._records_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(r) + "\n" for r in records))
+                records = []
+            # Unique temp file per flush so concurrent flushes never share one
+            fd, tmp_path = tempfile.mkstemp(prefix="usage_totals.", suffix=".tmp", dir=self.usage_dir)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({'day': today, 'tenants': tenants}, f, indent=2)
+                os.replace(tmp_path, self._snapshot_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("Failed to flush usage records to %s: %s", self.usage_dir, e)
+            if records:
+                with self._lock:
+                    self._buffer[:0] = records
+    
+    def session_usage(self, session_id: str) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._totals.get(('session', session_id), self._totals.default_factory()))
+    
+    def tenant_usage(self, tenant_id: str) -> Dict[str, float]:
+        """Today's usage for a tenant"""
+        with self._lock:
+            key = ('tenant', tenant_id, date.today().isoformat())
+            return dict(self._totals.get(key, self._totals.default_factory()))
+    
+    def tenant_quota(self, tenant_id: str) -> Dict[str, float]:
+        return self.tenant_quotas.get(tenant_id, self.default_tenant_quota)
+    
+    def check(self, session_id: Optional[str], tenant_id: Optional[str]) -> str:
+        """Quota state for the next call: OK, SOFT (degrade) or HARD (reject)"""
+        tenant_id = tenant_id or SYSTEM_TENANT
+        today = date.today().isoformat()
+        with self._lock:
+            tenant = self._totals.get(('tenant', tenant_id, today))
+            session = self._totals.get(('session', session_id)) if session_id else None
+        
+        state = OK
+        for totals, quota in ((tenant, self.tenant_quota(tenant_id)), (session, self.session_quota)):
+            if not totals:
+                continue
+            if totals['cost'] >= quota['hard']:
+                return HARD
+            if totals['cost'] >= quota['soft']:
+                state = SOFT
+        return state
+
+class AnswerCache:
+    """Small LRU of recent completions, served when quotas are tight"""
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(tenant_id: Optional[str], method: str, messages: List[Dict]) -> str:
+        """Key on the tenant and the exact messages sent, including any per-session context"""
+        payload = json.dumps([tenant_id or SYSTEM_TENANT, method, messages], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+    
+    def put(self, key: str, answer: str) -> None:
+        with self._lock:
+            self._entries[key] = answer
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+usage_ledger = UsageLedger()
+answer_cache = AnswerCache()
+
+atexit.register(usage_ledger.flush)
@@ -1,8 +1,15 @@
 import openai
 import json
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
 import os
+import time
+import threading
+from validation import PlanValidation
+from budgets import output_budgets, route_label
+from prompts import PROMPTS, compact
+from context import estimate_tokens
+from accounting import ECONOMY_MODEL, HARD, OK, answer_cache, usage_ledger
 
 # Configuration - add your API key here or via environment variable
 openai.api_key = os.getenv("OPENAI_API_KEY")  # Set this in your environment
@@ -10,136 +17,222 @@ openai.api_key = os.getenv("OPENAI_API_KEY")  # Set this in your environment
 class AIAgent:
     """Base class for all AI agents with shared LLM capabilities"""
     
-    def __init__(self, memory, name: str, role_description: str):
-        self.memory = memory
+    def __init__(self, name: str, role_description: str):
+        # Agents hold no per-request state so one instance can serve every session;
+        # the caller's Memory is passed into each method instead.
         self.name = name
-        self.role_description = role_description
+        self.role_description = compact(role_description)
         self.model = "gpt-3.5-turbo"  # Using GPT-3.5 for cost efficiency
+        self._system_message = {"role": "system", "content": self.role_description}
+    
+    def _build_messages(self, memory, prompt: str) -> List[Dict]:
+        """Assemble the chat messages for a prompt
+        
+        Per-session text goes last so the system prompt and the template's
+        static instructions form a prefix shared by every call.
+        """
+        # Rolling summary of earlier turns, already trimmed to its token budget
+        summary = memory.get_conversation_context('summary')
+        if summary:
+            prompt = f"{prompt}\n\nContext from earlier in this conversation:\n{summary}"
+        return [self._system_message, {"role": "user", "content": prompt}]
+    
+    def _cache_key(self, memory, method: str, messages: List[Dict]) -> str:
+        return answer_cache.key(memory.get_conversation_context('tenant_id'), method, messages)
     
-    def _make_llm_call(self, prompt: str, temperature: float = 0.7) -> str:
-        """Make a call to the language model"""
+    def _admit(self, memory, method: str, cache_key: str):
+        """Check quotas before a call
+        
+        Returns (model, request params, answer to use instead of calling the
+        model, whether the call was degraded). Past the soft quota a cached answer is preferred, otherwise the
+        call is downgraded to ECONOMY_MODEL with half the output budget (if
+        ECONOMY_MODEL is configured as the agent's own model, only the budget
+        shrinks); past the hard quota only cached answers are served.
+        """
+        session_id = memory.get_conversation_context('session_id')
+        tenant_id = memory.get_conversation_context('tenant_id')
+        quota = usage_ledger.check(session_id, tenant_id)
+        params = output_budgets.params(method)
+        if quota == OK:
+            return self.model, params, None, False
+        
+        cached = answer_cache.get(cache_key)
+        if cached is not None:
+            memory.add(self.name, "💾 Usage quota nearly reached, serving a cached answer")
+            return self.model, params, cached, False
+        if quota == HARD:
+            memory.add(self.name, "⛔ Usage quota reached, request not sent")
+            return self.model, params, self._quota_response(), False
+        
+        params['max_tokens'] = max(8, params['max_tokens'] // 2)
+        return ECONOMY_MODEL, params, None, True
+    
+    def _record_usage(self, memory, method: str, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        usage_ledger.record(memory.get_conversation_context('session_id'),
+                            memory.get_conversation_context('tenant_id'),
+                            self.name, method, model, prompt_tokens, completion_tokens)
+    
+    def _make_llm_call(self, memory, prompt: str, temperature: float = 0.7, method: str = "default") -> str:
+        """Make a call to the language model with the output budget for `method`"""
         try:
             if not openai.api_key:
                 # Fallback for demo purposes when no API key is provided
                 return self._fallback_response(prompt)
             
+            messages = self._build_messages(memory, prompt)
+            cache_key = self._cache_key(memory, method, messages)
+            model, params, answer, degraded = self._admit(memory, method, cache_key)
+            if answer is not None:
+                return answer
+            
+            start = time.perf_counter()
             response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.role_description},
-                    {"role": "user", "content": prompt}
-                ],
+                model=model,
+                messages=messages,
                 temperature=temperature,
-                max_tokens=500
+                **params
             )
-            return response.choices[0].message.content.strip()
+            output_budgets.record(self.name, method, response.usage.completion_tokens, time.perf_counter() - start,
+                                  params['max_tokens'], response.choices[0].finish_reason, degraded)
+            self._record_usage(memory, method, model, response.usage.prompt_tokens, response.usage.completion_tokens)
+            
+            answer = response.choices[0].message.content.strip()
+            answer_cache.put(cache_key, answer)
+            return answer
         except Exception as e:
-            self.memory.add(self.name, f"⚠️ AI service unavailable, using fallback: {str(e)}")
+            memory.add(self.name, f"⚠️ AI service unavailable, using fallback: {str(e)}")
             return self._fallback_response(prompt)
     
+    def _stream_llm_call(self, memory, prompt: str, temperature: float = 0.7, method: str = "default") -> Iterator[str]:
+        """Stream a language model response chunk by chunk"""
+        if not openai.api_key:
+            yield self._fallback_response(prompt)
+            return
+        
+        messages = self._build_messages(memory, prompt)
+        cache_key = self._cache_key(memory, method, messages)
+        model, params, answer, degraded = self._admit(memory, method, cache_key)
+        if answer is not None:
+            yield answer
+            return
+        
+        streamed = []
+        try:
+            start = time.perf_counter()
+            response = openai.ChatCompletion.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                **params
+            )
+            finish_reason = None
+            for chunk in response:
+                content = chunk.choices[0].delta.get("content")
+                finish_reason = chunk.choices[0].get("finish_reason") or finish_reason
+                if content:
+                    streamed.append(content)
+                    yield content
+            # Streamed responses carry no usage block; each delta is roughly one token
+            output_budgets.record(self.name, method, len(streamed), time.perf_counter() - start,
+                                  params['max_tokens'], finish_reason, degraded)
+            self._record_usage(memory, method, model,
+                               sum(estimate_tokens(m["content"]) for m in messages), len(streamed))
+            answer_cache.put(cache_key, "".join(streamed).strip())
+        except Exception as e:
+            memory.add(self.name, f"⚠️ AI service unavailable, using fallback: {str(e)}")
+            if not streamed:
+                yield self._fallback_response(prompt)
+    
     def _fallback_response(self, prompt: str) -> str:
         """Fallback response when AI is unavailable"""
         return "AI service is currently unavailable. Please add your OpenAI API key to enable full AI capabilities."
+    
+    def _quota_response(self) -> str:
+        """Response when the session or tenant has used up its hard quota"""
+        return "The AI usage limit for your session or organization has been reached. Please try again later or contact your administrator."
 
 class OnboardingAgent(AIAgent):
-    def __init__(self, memory):
-        role_description = """You are an expert career onboarding specialist. Your role is to:
-        1. Analyze career challenges and questions from professionals
-        2. Determine the type of support needed (skill development, career transition, leadership, etc.)
-        3. Route requests to appropriate specialist agents
-        4. Coordinate responses from multiple agents
-        5. Provide initial assessment and context setting
-        
-        You should be empathetic, professional, and strategic in your analysis. Always consider the person's career stage, goals, and immediate needs."""
-        
-        super().__init__(memory, "OnboardingAgent", role_description)
+    ROLE_DESCRIPTION = """You are an expert career onboarding specialist. Your role is to:
+    1. Analyze career challenges and questions from professionals
+    2. Determine the type of support needed (skill development, career transition, leadership, etc.)
+    3. Route requests to appropriate specialist agents
+    4. Coordinate responses from multiple agents
+    5. Provide initial assessment and context setting
     
-    def handle(self, query: str, user_profile: Optional[Dict] = None) -> str:
-        """Analyze query and orchestrate response from other agents"""
-        
-        # Build context prompt
-        context = f"""
-        User Query: "{query}"
+    You should be empathetic, professional, and strategic in your analysis. Always consider the person's career stage, goals, and immediate needs."""
+
+    def __init__(self, registry: "AgentRegistry"):
+        super().__init__("OnboardingAgent", self.ROLE_DESCRIPTION)
+        self.registry = registry
+    
+    def handle(self, memory, query: str, user_profile: Optional[Dict] = None,
+               validate: bool = False, candidates: int = 1) -> str:
+        """Analyze query and orchestrate response from other agents
         
-        User Profile:
-        - Role: {user_profile.get('role', 'Not specified') if user_profile else 'Not specified'}
-        - Experience: {user_profile.get('experience', 'Not specified') if user_profile else 'Not specified'}
-        - Name: {user_profile.get('name', 'User') if user_profile else 'User'}
+        With validate=True the FeedbackAgent checks plan sections while the plan
+        is still streaming; candidates > 1 also generates that many plans in
+        parallel at different temperatures and keeps the best-validated one.
+        """
         
-        Please analyze this career challenge and:
-        1. Identify the main type of challenge (transition, skill development, leadership, assessment, etc.)
-        2. Suggest which specialist agents should be involved
-        3. Provide initial insights and direction
+        # Routing only needs a one-word label
+        context = PROMPTS["route"].render(user_profile, query=query)
         
-        Respond in a structured format with your analysis.
-        """
+        memory.add(self.name, "🔍 Analyzing career challenge with AI...")
+        analysis = self._make_llm_call(memory, context, temperature=0.0, method="route")
+        label = route_label(analysis)
+        memory.add(self.name, f"📋 AI Routing: {label.title() if label else analysis[:100] + '...'}")
         
-        self.memory.add(self.name, "🔍 Analyzing career challenge with AI...")
-        analysis = self._make_llm_call(context, temperature=0.3)
-        self.memory.add(self.name, f"📋 AI Analysis: {analysis[:100]}...")
+        validation = PlanValidation(self.registry.feedback, query, candidates) if validate else None
         
         # Determine which agents to involve based on AI analysis
-        if "skill" in analysis.lower() or "learning" in analysis.lower():
-            skill_agent = SkillAnalysisAgent(self.memory)
-            skill_insights = skill_agent.analyze_skills(query, user_profile)
-            
-            learning_agent = LearningAgent(self.memory)
-            final_plan = learning_agent.create_learning_plan(query, skill_insights, user_profile)
-            return final_plan
+        # Fall back to keyword matching if the model didn't return a clean label
+        if label == "SKILL" or (label is None and ("skill" in analysis.lower() or "learning" in analysis.lower())):
+            skill_insights = self.registry.skill_analysis.analyze_skills(memory, query, user_profile)
+            final_plan = self.registry.learning.create_learning_plan(memory, query, skill_insights, user_profile, validation)
             
-        elif "transition" in analysis.lower() or "change" in analysis.lower():
-            feedback_agent = FeedbackAgent(self.memory)
-            current_assessment = feedback_agent.assess_transition_readiness(query, user_profile)
-            
-            learning_agent = LearningAgent(self.memory)
-            transition_plan = learning_agent.create_transition_plan(query, current_assessment, user_profile)
-            return transition_plan
+        elif label == "TRANSITION" or (label is None and ("transition" in analysis.lower() or "change" in analysis.lower())):
+            current_assessment = self.registry.feedback.assess_transition_readiness(memory, query, user_profile)
+            final_plan = self.registry.learning.create_transition_plan(memory, query, current_assessment, user_profile, validation)
             
         else:
             # General career development - involve multiple agents
-            feedback_agent = FeedbackAgent(self.memory)
-            feedback_result = feedback_agent.analyze_situation(query, user_profile)
-            
-            learning_agent = LearningAgent(self.memory)
-            comprehensive_plan = learning_agent.create_development_plan(query, feedback_result, user_profile)
-            return comprehensive_plan
+            feedback_result = self.registry.feedback.analyze_situation(memory, query, user_profile)
+            final_plan = self.registry.learning.create_development_plan(memory, query, feedback_result, user_profile, validation)
+        
+        if validation:
+            final_plan = f"{final_plan}\n\n{validation.report()}"
+        return final_plan
 
 class LearningAgent(AIAgent):
-    def __init__(self, memory):
-        role_description = """You are an expert learning and development strategist. Your expertise includes:
-        1. Creating personalized learning paths for professionals
-        2. Designing career transition roadmaps
-        3. Recommending specific resources, courses, and experiences
-        4. Setting realistic timelines and milestones
-        5. Balancing theoretical learning with practical application
-        
-        You should provide specific, actionable learning plans with clear steps, timelines, and success metrics. Consider different learning styles and practical constraints."""
-        
-        super().__init__(memory, "LearningAgent", role_description)
+    ROLE_DESCRIPTION = """You are an expert learning and development strategist. Your expertise includes:
+    1. Creating personalized learning paths for professionals
+    2. Designing career transition roadmaps
+    3. Recommending specific resources, courses, and experiences
+    4. Setting realistic timelines and milestones
+    5. Balancing theoretical learning with practical application
     
-    def create_learning_plan(self, query: str, skill_analysis: str, user_profile: Optional[Dict] = None) -> str:
+    You should provide specific, actionable learning plans with clear steps, timelines, and success metrics. Consider different learning styles and practical constraints."""
+
+    def __init__(self):
+        super().__init__("LearningAgent", self.ROLE_DESCRIPTION)
+    
+    def _generate_plan(self, memory, prompt: str, temperature: float, method: str,
+                       validation: Optional[PlanValidation] = None) -> str:
+        """Generate plan text, validating it section by section when requested"""
+        if validation is None:
+            return self._make_llm_call(memory, prompt, temperature=temperature, method=method)
+        return validation.run(self, memory, prompt, temperature, method)
+    
+    def create_learning_plan(self, memory, query: str, skill_analysis: str, user_profile: Optional[Dict] = None,
+                             validation: Optional[PlanValidation] = None) -> str:
         """Create a comprehensive learning plan based on skill analysis"""
         
-        prompt = f"""
-        Based on this career challenge and skill analysis, create a detailed learning plan:
-        
-        Challenge: "{query}"
-        Skill Analysis: {skill_analysis}
-        User Background: {user_profile.get('role', 'Professional') if user_profile else 'Professional'} with {user_profile.get('experience', 'some') if user_profile else 'some'} experience
-        
-        Please create a comprehensive learning plan that includes:
-        1. 3-4 key learning objectives
-        2. Specific resources and activities for each objective
-        3. Realistic timeline (4-8 weeks)
-        4. Success metrics and milestones
-        5. Practical application opportunities
+        prompt = PROMPTS["create_learning_plan"].render(user_profile, query=query, skill_analysis=skill_analysis)
         
-        Make it actionable and specific to their situation.
-        """
-        
-        self.memory.add(self.name, "📚 AI creating personalized learning strategy...")
-        plan = self._make_llm_call(prompt, temperature=0.4)
-        self.memory.add(self.name, f"✨ Generated comprehensive AI-powered learning plan")
+        memory.add(self.name, "📚 AI creating personalized learning strategy...")
+        plan = self._generate_plan(memory, prompt, 0.4, "create_learning_plan", validation)
+        memory.add(self.name, f"✨ Generated comprehensive AI-powered learning plan")
         
         return f"""
 ## 🎯 Your AI-Generated Learning Plan
@@ -150,29 +243,15 @@ class LearningAgent(AIAgent):
 *This plan was created by AI analysis of your specific situation and goals.*
         """.strip()
     
-    def create_transition_plan(self, query: str, assessment: str, user_profile: Optional[Dict] = None) -> str:
+    def create_transition_plan(self, memory, query: str, assessment: str, user_profile: Optional[Dict] = None,
+                               validation: Optional[PlanValidation] = None) -> str:
         """Create a career transition roadmap"""
         
-        prompt = f"""
-        Create a strategic career transition plan for this professional:
-        
-        Transition Goal: "{query}"
-        Current Assessment: {assessment}
-        Background: {user_profile.get('role', 'Current professional') if user_profile else 'Current professional'}
+        prompt = PROMPTS["create_transition_plan"].render(user_profile, query=query, assessment=assessment)
         
-        Design a transition roadmap with:
-        1. Phase-by-phase approach (3 phases over 8-12 weeks)
-        2. Skill development priorities
-        3. Networking and positioning strategies
-        4. Portfolio/credential building
-        5. Market entry tactics
-        
-        Be specific about actions they can take immediately.
-        """
-        
-        self.memory.add(self.name, "🔄 AI designing career transition roadmap...")
-        roadmap = self._make_llm_call(prompt, temperature=0.5)
-        self.memory.add(self.name, "🎯 Completed AI-powered transition strategy")
+        memory.add(self.name, "🔄 AI designing career transition roadmap...")
+        roadmap = self._generate_plan(memory, prompt, 0.5, "create_transition_plan", validation)
+        memory.add(self.name, "🎯 Completed AI-powered transition strategy")
         
         return f"""
 ## 🚀 Your AI-Generated Transition Roadmap
@@ -183,29 +262,15 @@ class LearningAgent(AIAgent):
 *This roadmap uses AI analysis to create a personalized strategy for your career change.*
         """.strip()
     
-    def create_development_plan(self, query: str, feedback: str, user_profile: Optional[Dict] = None) -> str:
+    def create_development_plan(self, memory, query: str, feedback: str, user_profile: Optional[Dict] = None,
+                                validation: Optional[PlanValidation] = None) -> str:
         """Create general career development plan"""
         
-        prompt = f"""
-        Create a professional development plan for this career challenge:
-        
-        Challenge: "{query}"
-        Situation Analysis: {feedback}
-        Professional Level: {user_profile.get('experience', 'Mid-level') if user_profile else 'Mid-level'}
-        
-        Design a development strategy that includes:
-        1. Short-term goals (next 2-4 weeks)
-        2. Medium-term objectives (2-3 months)
-        3. Skill building activities
-        4. Performance improvement tactics
-        5. Career positioning strategies
-        
-        Focus on practical, high-impact actions.
-        """
+        prompt = PROMPTS["create_development_plan"].render(user_profile, query=query, feedback=feedback)
         
-        self.memory.add(self.name, "📈 AI crafting professional development strategy...")
-        strategy = self._make_llm_call(prompt, temperature=0.4)
-        self.memory.add(self.name, "✅ Generated AI-powered development plan")
+        memory.add(self.name, "📈 AI crafting professional development strategy...")
+        strategy = self._generate_plan(memory, prompt, 0.4, "create_development_plan", validation)
+        memory.add(self.name, "✅ Generated AI-powered development plan")
         
         return f"""
 ## 📈 Your AI-Generated Development Plan
@@ -217,131 +282,79 @@ class LearningAgent(AIAgent):
         """.strip()
 
 class FeedbackAgent(AIAgent):
-    def __init__(self, memory):
-        role_description = """You are an expert career coach and performance analyst. Your capabilities include:
-        1. Analyzing professional situations and challenges
-        2. Assessing career transition readiness
-        3. Identifying strengths and development areas
-        4. Providing realistic feedback and recommendations
-        5. Validating learning plans and strategies
-        
-        You should be honest, constructive, and supportive while providing data-driven insights about career development paths."""
-        
-        super().__init__(memory, "FeedbackAgent", role_description)
+    ROLE_DESCRIPTION = """You are an expert career coach and performance analyst. Your capabilities include:
+    1. Analyzing professional situations and challenges
+    2. Assessing career transition readiness
+    3. Identifying strengths and development areas
+    4. Providing realistic feedback and recommendations
+    5. Validating learning plans and strategies
     
-    def analyze_situation(self, query: str, user_profile: Optional[Dict] = None) -> str:
+    You should be honest, constructive, and supportive while providing data-driven insights about career development paths."""
+
+    def __init__(self):
+        super().__init__("FeedbackAgent", self.ROLE_DESCRIPTION)
+    
+    def analyze_situation(self, memory, query: str, user_profile: Optional[Dict] = None) -> str:
         """Analyze the user's current situation and provide feedback"""
         
-        prompt = f"""
-        Analyze this professional's career situation and provide coaching feedback:
-        
-        Challenge/Question: "{query}"
-        Current Role: {user_profile.get('role', 'Professional') if user_profile else 'Professional'}
-        Experience Level: {user_profile.get('experience', 'Mid-level') if user_profile else 'Mid-level'}
+        prompt = PROMPTS["analyze_situation"].render(user_profile, query=query)
         
-        Provide a realistic assessment that covers:
-        1. Current situation analysis
-        2. Key strengths they can leverage
-        3. Areas that need development
-        4. Market/industry context
-        5. Recommended next steps
-        
-        Be supportive but honest about challenges and opportunities.
-        """
-        
-        self.memory.add(self.name, "💬 AI analyzing career situation...")
-        analysis = self._make_llm_call(prompt, temperature=0.3)
-        self.memory.add(self.name, "📊 Completed AI situation assessment")
+        memory.add(self.name, "💬 AI analyzing career situation...")
+        analysis = self._make_llm_call(memory, prompt, temperature=0.3, method="analyze_situation")
+        memory.add(self.name, "📊 Completed AI situation assessment")
         
         return analysis
     
-    def assess_transition_readiness(self, query: str, user_profile: Optional[Dict] = None) -> str:
+    def assess_transition_readiness(self, memory, query: str, user_profile: Optional[Dict] = None) -> str:
         """Assess readiness for career transition"""
         
-        prompt = f"""
-        Assess this professional's readiness for career transition:
-        
-        Desired Transition: "{query}"
-        Current Background: {user_profile.get('role', 'Professional') if user_profile else 'Professional'} with {user_profile.get('experience', 'some') if user_profile else 'some'} experience
-        
-        Evaluate and provide feedback on:
-        1. Transferable skills and strengths
-        2. Skill gaps that need addressing
-        3. Market timing and opportunities
-        4. Transition challenges to expect
-        5. Readiness score (1-10) with reasoning
+        prompt = PROMPTS["assess_transition_readiness"].render(user_profile, query=query)
         
-        Be realistic about the transition difficulty and timeline.
-        """
-        
-        self.memory.add(self.name, "📍 AI assessing transition readiness...")
-        assessment = self._make_llm_call(prompt, temperature=0.3)
-        self.memory.add(self.name, "🎯 Completed AI transition assessment")
+        memory.add(self.name, "📍 AI assessing transition readiness...")
+        assessment = self._make_llm_call(memory, prompt, temperature=0.3, method="assess_transition_readiness")
+        memory.add(self.name, "🎯 Completed AI transition assessment")
         
         return assessment
     
-    def validate_plan(self, plan: str, original_query: str) -> str:
+    def validate_plan(self, memory, plan: str, original_query: str) -> str:
         """Validate a learning or development plan"""
         
-        prompt = f"""
-        Review and validate this career development plan:
-        
-        Original Challenge: "{original_query}"
-        Proposed Plan: {plan}
+        prompt = PROMPTS["validate_plan"].render(plan=plan, original_query=original_query)
         
-        Provide validation feedback on:
-        1. Plan completeness and relevance
-        2. Realistic timeline and expectations
-        3. Potential gaps or oversights
-        4. Success probability assessment
-        5. Suggested improvements or additions
+        memory.add(self.name, "🔍 AI validating development plan...")
+        validation = self._make_llm_call(memory, prompt, temperature=0.3, method="validate_plan")
+        memory.add(self.name, "✅ Completed AI plan validation")
         
-        Give constructive feedback to optimize the plan.
-        """
+        return validation
+    
+    def validate_section(self, memory, section: str, original_query: str) -> str:
+        """Quickly validate one section of a plan that is still being generated"""
         
-        self.memory.add(self.name, "🔍 AI validating development plan...")
-        validation = self._make_llm_call(prompt, temperature=0.3)
-        self.memory.add(self.name, "✅ Completed AI plan validation")
+        prompt = PROMPTS["validate_section"].render(section=section, original_query=original_query)
         
-        return validation
+        return self._make_llm_call(memory, prompt, temperature=0.2, method="validate_section")
 
 class SkillAnalysisAgent(AIAgent):
-    def __init__(self, memory):
-        role_description = """You are an expert skills analyst and career strategist. Your expertise covers:
-        1. Comprehensive skill gap analysis
-        2. Industry skill requirements and trends
-        3. Skill development prioritization
-        4. Competency frameworks and assessments
-        5. Future skill predictions and recommendations
-        
-        You should provide detailed, actionable skill analysis that helps professionals make informed decisions about their development priorities."""
-        
-        super().__init__(memory, "SkillAnalysisAgent", role_description)
+    ROLE_DESCRIPTION = """You are an expert skills analyst and career strategist. Your expertise covers:
+    1. Comprehensive skill gap analysis
+    2. Industry skill requirements and trends
+    3. Skill development prioritization
+    4. Competency frameworks and assessments
+    5. Future skill predictions and recommendations
+    
+    You should provide detailed, actionable skill analysis that helps professionals make informed decisions about their development priorities."""
+
+    def __init__(self):
+        super().__init__("SkillAnalysisAgent", self.ROLE_DESCRIPTION)
     
-    def analyze_skills(self, query: str, user_profile: Optional[Dict] = None) -> str:
+    def analyze_skills(self, memory, query: str, user_profile: Optional[Dict] = None) -> str:
         """Perform comprehensive AI-powered skill analysis"""
         
-        prompt = f"""
-        Conduct a comprehensive skill analysis for this professional:
-        
-        Career Challenge/Goal: "{query}"
-        Current Role: {user_profile.get('role', 'Professional') if user_profile else 'Professional'}
-        Experience: {user_profile.get('experience', 'Mid-level') if user_profile else 'Mid-level'}
-        
-        Provide a detailed skill analysis including:
-        1. Current skill strengths (based on role/experience)
-        2. Skills required for their goal/challenge
-        3. Critical skill gaps (high priority)
-        4. Nice-to-have skills (medium priority)
-        5. Industry trends affecting skill requirements
-        6. Recommended skill development sequence
-        
-        Be specific about technical and soft skills, and consider future market trends.
-        """
+        prompt = PROMPTS["analyze_skills"].render(user_profile, query=query)
         
-        self.memory.add(self.name, "🔬 AI conducting comprehensive skill analysis...")
-        analysis = self._make_llm_call(prompt, temperature=0.4)
-        self.memory.add(self.name, "📊 Completed AI-powered skill gap analysis")
+        memory.add(self.name, "🔬 AI conducting comprehensive skill analysis...")
+        analysis = self._make_llm_call(memory, prompt, temperature=0.4, method="analyze_skills")
+        memory.add(self.name, "📊 Completed AI-powered skill gap analysis")
         
         return f"""
 ## 🔬 AI-Powered Skill Analysis
@@ -352,28 +365,50 @@ class SkillAnalysisAgent(AIAgent):
 *This analysis uses AI to evaluate your skills against current market requirements and future trends.*
         """.strip()
     
-    def predict_future_skills(self, role: str, timeframe: str = "next 2-3 years") -> str:
+    def predict_future_skills(self, memory, role: str, timeframe: str = "next 2-3 years") -> str:
         """Predict future skill requirements for a role"""
         
-        prompt = f"""
-        Predict the evolving skill requirements for {role} over the {timeframe}:
+        prompt = PROMPTS["predict_future_skills"].render(role=role, timeframe=timeframe)
         
-        Consider:
-        1. Technology trends affecting this role
-        2. Industry evolution and market changes
-        3. Automation impact on required skills
-        4. Emerging competencies becoming important
-        5. Skills that may become less relevant
-        
-        Provide strategic insights for skill development planning.
-        """
-        
-        self.memory.add(self.name, f"🔮 AI predicting future skills for {role}...")
-        prediction = self._make_llm_call(prompt, temperature=0.6)
-        self.memory.add(self.name, "📈 Completed future skills analysis")
+        memory.add(self.name, f"🔮 AI predicting future skills for {role}...")
+        prediction = self._make_llm_call(memory, prompt, temperature=0.6, method="predict_future_skills")
+        memory.add(self.name, "📈 Completed future skills analysis")
         
         return prediction
 
+class AgentRegistry:
+    """Long-lived pool of stateless agents shared across sessions and threads"""
+    
+    def __init__(self):
+        self.skill_analysis = SkillAnalysisAgent()
+        self.learning = LearningAgent()
+        self.feedback = FeedbackAgent()
+        self.onboarding = OnboardingAgent(self)
+        self._agents = {
+            agent.name: agent
+            for agent in (self.onboarding, self.learning, self.feedback, self.skill_analysis)
+        }
+    
+    def get(self, name: str) -> AIAgent:
+        """Look up an agent by its name, e.g. LearningAgent"""
+        return self._agents[name]
+    
+    def names(self) -> List[str]:
+        """Names of all registered agents"""
+        return list(self._agents)
+
+_registry: Optional[AgentRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> AgentRegistry:
+    """Get the process-wide agent registry, creating it on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = AgentRegistry()
+    return _registry
+
 # Alternative implementation for when OpenAI API is not available
 class MockAIAgent:
     """Mock agent that provides intelligent-seeming responses without actual AI"""
@@ -1,9 +1,17 @@
 import streamlit as st
 import time
 import os
+import uuid
 from datetime import datetime
-from agents import OnboardingAgent, LearningAgent, FeedbackAgent, SkillAnalysisAgent
+from agents import get_registry
+from budgets import output_budgets
+from accounting import SOFT, HARD, resolve_tenant, usage_ledger
+from forecasts import SkillForecastService
 from memory import Memory
+from auditlog import AuditLog
+from profiling import close_stale_request, requested_mode, start_request, finish_request, span
+from feed import ActivityFeed
+from context import RollingContext
 import plotly.express as px
 import pandas as pd
 
@@ -15,6 +23,12 @@ st.set_page_config(
     page_icon="🧭"
 )
 
+# Profiling mode from PATHFINDER_PROFILE; ?profile=1 (timers) or ?profile=sample
+# only count when the operator set PATHFINDER_PROFILE=allow
+profile_mode = requested_mode(st.query_params.get("profile"))
+close_stale_request()  # left over if the previous run was interrupted by a rerun
+request_profile = start_request("streamlit rerun", profile_mode) if profile_mode else None
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -89,11 +103,51 @@ if not api_key_available:
     </div>
     """, unsafe_allow_html=True)
 
+# Only the most recent turns are kept; older ones live on in the rolling context summary
+MAX_CONVERSATION_HISTORY = 20
+
+# Agents are stateless, so a single registry is shared by every session
+@st.cache_resource
+def load_agent_registry():
+    return get_registry()
+
+agent_registry = load_agent_registry()
+
+ROLES = ["Software Engineer", "Data Scientist", "Product Manager",
+         "Designer", "Marketing", "Sales", "Student", "Other"]
+
+# Every agent interaction is retained when PATHFINDER_AUDIT_DIR is set
+@st.cache_resource
+def load_audit_log():
+    audit_dir = os.getenv("PATHFINDER_AUDIT_DIR")
+    return AuditLog(audit_dir) if audit_dir else None
+
+audit_log = load_audit_log()
+
+# Future-skill forecasts are precomputed in the background and served from disk
+@st.cache_resource
+def load_forecast_service():
+    forecast_roles = [r for r in ROLES if r != "Other"]
+    return SkillForecastService(agent_registry.skill_analysis, forecast_roles,
+                                audit_log=audit_log).start()
+
+forecast_service = load_forecast_service()
+
+# Usage is accounted per client organization, resolved server-side from an
+# operator-issued ?access=<token> (PATHFINDER_TENANT_TOKENS) or PATHFINDER_TENANT
+tenant_id = resolve_tenant(st.query_params.get("access"))
+
 # Initialize session state
 if 'memory' not in st.session_state:
-    st.session_state.memory = Memory()
+    st.session_state.memory = Memory(audit_log)
+if 'activity_feed' not in st.session_state:
+    st.session_state.activity_feed = ActivityFeed()
 if 'conversation_history' not in st.session_state:
     st.session_state.conversation_history = []
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'rolling_context' not in st.session_state:
+    st.session_state.rolling_context = RollingContext()
 if 'user_profile' not in st.session_state:
     st.session_state.user_profile = {
         'name': '',
@@ -103,7 +157,7 @@ if 'user_profile' not in st.session_state:
     }
 
 # Sidebar for user profile and settings
-with st.sidebar:
+with st.sidebar, span("render.sidebar"):
     st.header("👤 Your Profile")
     
     # AI Status Indicator
@@ -114,18 +168,26 @@ with st.sidebar:
     
     with st.expander("Setup Your Profile", expanded=True):
         name = st.text_input("Name", value=st.session_state.user_profile['name'])
-        role = st.selectbox("Current Role", 
-            ["Software Engineer", "Data Scientist", "Product Manager", 
-             "Designer", "Marketing", "Sales", "Student", "Other"])
+        role = st.selectbox("Current Role", ROLES)
         experience = st.selectbox("Experience Level", 
             ["Fresh Graduate", "1-2 years", "3-5 years", "5+ years"])
         
         if st.button("Update Profile"):
+            previous = st.session_state.user_profile
+            if previous['role'] and (previous['role'], previous['experience']) != (role, experience):
+                # What we inferred about the old profile no longer applies
+                st.session_state.rolling_context.clear()
             st.session_state.user_profile.update({
                 'name': name, 'role': role, 'experience': experience
             })
             st.success("Profile updated! AI agents will personalize responses.")
     
+    with st.expander("⚙️ Plan Validation", expanded=False):
+        validate_plans = st.checkbox("Validate plans while they generate", value=False,
+            help="FeedbackAgent reviews each plan section as soon as it streams in")
+        plan_candidates = st.slider("Candidate plans", 1, 3, 1, disabled=not validate_plans,
+            help="Generate several plans in parallel and keep the best-validated one")
+    
     st.markdown("---")
     
     # AI Agent Status
@@ -169,7 +231,7 @@ with st.sidebar:
 # Main content area
 col1, col2 = st.columns([2, 1])
 
-with col1:
+with col1, span("render.chat"):
     st.header("💬 Chat with Your AI Agent Team")
     
     # AI Capability Notice
@@ -212,7 +274,7 @@ with col1:
     if st.button("🚀 Activate AI Agent Team", type="primary") or user_input:
         if user_input:
             # Clear previous memory for new conversation
-            st.session_state.memory = Memory()
+            st.session_state.memory = Memory(audit_log)
             
             # Display user input
             st.markdown(f"**You:** {user_input}")
@@ -235,12 +297,17 @@ with col1:
                 progress_bar.progress((i + 1) * 20)
                 time.sleep(0.8)  # Longer delay to show AI processing
             
-            # Initialize AI agents
-            onboarding = OnboardingAgent(st.session_state.memory)
+            # Give the agents a compact summary of earlier turns instead of the full history
+            st.session_state.rolling_context.sync_to_memory(st.session_state.memory)
+            st.session_state.memory.set_conversation_context('session_id', st.session_state.session_id)
+            st.session_state.memory.set_conversation_context('tenant_id', tenant_id)
             
             # Process with AI agents
             with st.spinner("🤖 AI agents collaborating..."):
-                response = onboarding.handle(user_input, st.session_state.user_profile)
+                response = agent_registry.onboarding.handle(
+                    st.session_state.memory, user_input, st.session_state.user_profile,
+                    validate=validate_plans, candidates=plan_candidates
+                )
             
             # Clear progress indicators
             progress_bar.empty()
@@ -249,39 +316,8 @@ with col1:
             # Display AI agent conversation
             st.markdown("### 🤖 AI Agent Intelligence Network")
             
-            agent_logs = st.session_state.memory.get_detailed_log()
-            for log_entry in agent_logs:
-                agent_name = log_entry['agent']
-                message = log_entry['message']
-                timestamp = log_entry['timestamp']
-                
-                # Different styling for different agents
-                if agent_name == "OnboardingAgent":
-                    icon = "🚪"
-                    color = "#e74c3c"
-                elif agent_name == "LearningAgent":
-                    icon = "📚"
-                    color = "#3498db"
-                elif agent_name == "FeedbackAgent":
-                    icon = "💬"
-                    color = "#f39c12"
-                elif agent_name == "SkillAnalysisAgent":
-                    icon = "🔬"
-                    color = "#9b59b6"
-                else:
-                    icon = "🤖"
-                    color = "#95a5a6"
-                
-                # Add AI indicator for actual AI responses
-                ai_indicator = "🧠 AI" if api_key_available else "🤖 Demo"
-                
-                st.markdown(f"""
-                <div class="agent-card">
-                    <strong>{icon} {agent_name}</strong> <span style="color: green; font-size: 0.8em;">{ai_indicator}</span>
-                    <small style="color: gray; float: right;">{timestamp}</small><br>
-                    {message}
-                </div>
-                """, unsafe_allow_html=True)
+            ai_indicator = "🧠 AI" if api_key_available else "🤖 Demo"
+            st.session_state.activity_feed.render(st.session_state.memory, ai_indicator)
             
             # Display final AI recommendation
             st.markdown("### 🎯 Your AI-Powered Action Plan")
@@ -301,11 +337,17 @@ with col1:
                 'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'ai_powered': api_key_available
             })
+            del st.session_state.conversation_history[:-MAX_CONVERSATION_HISTORY]
+            st.session_state.rolling_context.record_turn(user_input, response, st.session_state.user_profile)
             
         else:
             st.warning("💭 Please describe your career challenge for AI analysis!")
+    elif st.session_state.activity_feed.cards:
+        # No query this run: redraw the session's feed from its cached HTML
+        st.markdown("### 🤖 AI Agent Intelligence Network")
+        st.session_state.activity_feed.render()
 
-with col2:
+with col2, span("render.dashboard"):
     st.header("📈 AI Dashboard")
     
     # AI Agent activity summary
@@ -324,6 +366,25 @@ with col2:
     
     st.markdown("---")
     
+    # Future skills forecast, never blocks on the LLM
+    forecast_role = st.session_state.user_profile['role'] or role
+    st.subheader("🔮 Future Skills Outlook")
+    # Only scheduled roles are forecast; "Other" would queue an LLM call for a non-role
+    forecast = forecast_service.get(forecast_role) if forecast_role in forecast_service.roles else None
+    if forecast_role not in forecast_service.roles:
+        st.info(f"No skills outlook is available for {forecast_role}.")
+    elif forecast:
+        updated = datetime.fromisoformat(forecast['updated_at']).strftime("%Y-%m-%d")
+        with st.expander(f"{forecast_role} - {forecast['timeframe']}", expanded=False):
+            st.markdown(forecast['prediction'])
+        st.caption(f"Updated {updated}" + (" · refreshing in background" if forecast['refreshing'] else ""))
+    elif api_key_available:
+        st.info(f"Forecast for {forecast_role} is being prepared in the background.")
+    else:
+        st.info("🔧 Add API key to enable future skill forecasts")
+    
+    st.markdown("---")
+    
     # AI Intelligence Metrics
     st.subheader("🧠 AI Intelligence Metrics")
     col_a, col_b = st.columns(2)
@@ -342,6 +403,34 @@ with col2:
         st.metric("Total Sessions", total_interactions)
         st.metric("AI-Powered", ai_interactions, f"of {total_interactions}")
     
+    # Per-agent latency with adaptive output budgets
+    latency_rows = output_budgets.report()
+    if latency_rows:
+        st.subheader("⏱️ Agent Latency")
+        st.dataframe(pd.DataFrame(latency_rows), hide_index=True, use_container_width=True)
+        st.caption("cut_by_budget: responses stopped by a budget below the old 500-token cap; "
+                   "max_seconds_saved: upper bound for those responses only; "
+                   "seconds_saved_vs_baseline: against the measured old-prompt length (PATHFINDER_BUDGET_BASELINES); "
+                   "degraded_by_quota: calls with a quota-shrunk budget, excluded from both")
+    
+    # Token and cost accounting
+    if api_key_available:
+        st.subheader("💳 Usage")
+        session_usage = usage_ledger.session_usage(st.session_state.session_id)
+        tenant_usage = usage_ledger.tenant_usage(tenant_id)
+        col_c, col_d = st.columns(2)
+        with col_c:
+            st.metric("Session Tokens", session_usage['prompt_tokens'] + session_usage['completion_tokens'],
+                      f"${session_usage['cost']:.4f}")
+        with col_d:
+            st.metric(f"{tenant_id} Today", f"${tenant_usage['cost']:.2f}",
+                      f"of ${usage_ledger.tenant_quota(tenant_id)['hard']:.2f}", delta_color="off")
+        quota_state = usage_ledger.check(st.session_state.session_id, tenant_id)
+        if quota_state == HARD:
+            st.error("⛔ Usage quota reached: only cached answers are available")
+        elif quota_state == SOFT:
+            st.warning("🟡 Nearing usage quota: using cached answers and shorter responses")
+    
     st.markdown("---")
     
     # Conversation history
@@ -378,3 +467,16 @@ st.markdown(f"""
     {'<p style="color: green;">✅ Full AI capabilities active</p>' if api_key_available else '<p style="color: orange;">⚙️ Add OpenAI API key for full AI intelligence</p>'}
 </div>
 """, unsafe_allow_html=True)
+
+# Request profile: breakdown table and flame graph of this script run
+if request_profile:
+    finish_request(request_profile)
+    with st.expander(f"⏱️ Request Profile ({request_profile.duration * 1000:.0f} ms)", expanded=False):
+        st.caption(f"{request_profile.spans} timed spans, estimated timer overhead "
+                   f"{request_profile.overhead_pct():.2f}%")
+        st.dataframe(pd.DataFrame(request_profile.breakdown()), hide_index=True, use_container_width=True)
+        st.plotly_chart(request_profile.flame_figure(), use_container_width=True)
+        st.download_button("Download folded stacks", request_profile.folded(), file_name="pathfinder_spans.folded")
+        if profile_mode == "sample":
+            st.download_button("Download sampled stacks", request_profile.folded_samples(),
+                               file_name="pathfinder_samples.folded")
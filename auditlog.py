@@ -0,0 +1,261 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional
+
+# Record layout (little endian):
+#   header   magic "PFA1", payload length, crc32 of payload, timestamp, session id length
+#   payload  session id | agent length (u16) | agent | message length (u32) | message | metadata JSON
+HEADER = struct.Struct("<4sIIdH")
+MAGIC = b"PFA1"
+AGENT_LEN = struct.Struct("<H")
+MESSAGE_LEN = struct.Struct("<I")
+
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".log"
+
+def _segment_name(seq: int) -> str:
+    return f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}"
+
+def _list_segments(directory: str) -> List[str]:
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in names if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX))
+
+def _valid_records(buf, start: int = 0, verify: bool = True) -> Iterator[tuple]:
+    """Yield (offset, end, timestamp, session_len, payload_len) for intact records
+    
+    Stops at the first torn or corrupt record, which after a crash can only
+    be the tail of the newest segment. verify=False skips the CRC check for
+    ranges that were already validated.
+    """
+    offset, size = start, len(buf)
+    while offset + HEADER.size <= size:
+        magic, payload_len, crc, timestamp, session_len = HEADER.unpack_from(buf, offset)
+        end = offset + HEADER.size + payload_len
+        if magic != MAGIC or end > size:
+            return
+        if verify and zlib.crc32(buf[offset + HEADER.size:end]) != crc:
+            return
+        yield offset, end, timestamp, session_len, payload_len
+        offset = end
+
+class AuditRecord:
+    """One audit entry backed by the mapped segment; fields decode on access"""
+    
+    __slots__ = ("timestamp", "_payload", "_session_len")
+    
+    def __init__(self, timestamp: float, payload: memoryview, session_len: int):
+        self.timestamp = timestamp
+        self._payload = payload
+        self._session_len = session_len
+    
+    @property
+    def session_id(self) -> str:
+        return bytes(self._payload[:self._session_len]).decode("utf-8")
+    
+    def _fields(self):
+        pos = self._session_len
+        (agent_len,) = AGENT_LEN.unpack_from(self._payload, pos)
+        pos += AGENT_LEN.size
+        agent = self._payload[pos:pos + agent_len]
+        pos += agent_len
+        (message_len,) = MESSAGE_LEN.unpack_from(self._payload, pos)
+        pos += MESSAGE_LEN.size
+        return agent, self._payload[pos:pos + message_len], self._payload[pos + message_len:]
+    
+    @property
+    def agent(self) -> str:
+        return bytes(self._fields()[0]).decode("utf-8")
+    
+    @property
+    def message(self) -> str:
+        return bytes(self._fields()[1]).decode("utf-8")
+    
+    @property
+    def metadata(self) -> Dict:
+        raw = self._fields()[2]
+        return json.loads(bytes(raw)) if len(raw) else {}
+    
+    def to_dict(self) -> Dict:
+        return {'timestamp': self.timestamp, 'session_id': self.session_id,
+                'agent': self.agent, 'message': self.message, 'metadata': self.metadata}
+
+class AuditLog:
+    """Append-only, segment-rotated binary log of agent activity
+    
+    Each record goes out in a single write() on an O_APPEND descriptor and
+    carries a CRC, so a crash can at worst leave a torn record at the end of
+    the newest segment; it is truncated the next time the log is opened.
+    """
+    
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, fsync_interval: float = 1.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        # 0 fsyncs every record; None leaves flushing to the OS
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._last_sync = time.monotonic()
+        self._last_timestamp = 0.0
+        os.makedirs(directory, exist_ok=True)
+        
+        segments = _list_segments(directory)
+        self._seq = int(segments[-1][len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) if segments else 0
+        self._open_segment(recover=bool(segments))
+    
+    def _open_segment(self, recover: bool = False) -> None:
+        path = os.path.join(self.directory, _segment_name(self._seq))
+        if recover:
+            self._truncate_torn_tail(path)
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = os.fstat(self._fd).st_size
+    
+    def _truncate_torn_tail(self, path: str) -> None:
+        with open(path, "r+b") as f:
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                valid_end = 0
+                for _, end, timestamp, _, _ in _valid_records(buf):
+                    valid_end = end
+                    self._last_timestamp = timestamp
+            if valid_end < size:
+                f.truncate(valid_end)
+    
+    def append(self, session_id: str, agent: str, message: str,
+               metadata: Optional[Dict] = None, timestamp: Optional[float] = None) -> None:
+        """Write one record; cheap enough to call on every Memory.add"""
+        session = (session_id or "").encode("utf-8")
+        agent_bytes = agent.encode("utf-8")
+        message_bytes = message.encode("utf-8")
+        meta = json.dumps(metadata, default=str).encode("utf-8") if metadata else b""
+        payload = b"".join((session, AGENT_LEN.pack(len(agent_bytes)), agent_bytes,
+                            MESSAGE_LEN.pack(len(message_bytes)), message_bytes, meta))
+        
+        with self._lock:
+            # Keep timestamps non-decreasing so readers can bisect by time
+            timestamp = max(timestamp if timestamp is not None else time.time(), self._last_timestamp)
+            self._last_timestamp = timestamp
+            record = HEADER.pack(MAGIC, len(payload), zlib.crc32(payload), timestamp, len(session)) + payload
+            
+            if self._size and self._size + len(record) > self.segment_bytes:
+                self._rotate()
+            os.write(self._fd, record)
+            self._size += len(record)
+            
+            if self.fsync_interval is not None and time.monotonic() - self._last_sync >= self.fsync_interval:
+                os.fsync(self._fd)
+                self._last_sync = time.monotonic()
+    
+    def _rotate(self) -> None:
+        os.fsync(self._fd)
+        os.close(self._fd)
+        self._seq += 1
+        self._open_segment()
+    
+    def close(self) -> None:
+        with self._lock:
+            os.fsync(self._fd)
+            os.close(self._fd)
+
+class _Segment:
+    """Mapped segment plus a sparse (timestamp, offset) index over it"""
+    
+    def __init__(self, path: str, index_every: int):
+        self.path = path
+        self.index_every = index_every
+        self.buf = None
+        self.mapped_size = 0
+        self.end = 0
+        self.count = 0
+        self.index_times: List[float] = []
+        self.index_offsets: List[int] = []
+        self.sessions = set()
+        self.first_ts = None
+        self.last_ts = None
+    
+    def refresh(self) -> None:
+        """Map any bytes appended since the last refresh and index them"""
+        size = os.path.getsize(self.path)
+        if size == self.mapped_size:
+            return
+        with open(self.path, "rb") as f:
+            # Records handed out earlier keep the previous mapping alive
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.mapped_size = size
+        if self.buf is None:
+            return
+        
+        for offset, end, timestamp, session_len, _ in _valid_records(self.buf, self.end):
+            if self.count % self.index_every == 0:
+                self.index_times.append(timestamp)
+                self.index_offsets.append(offset)
+            start = offset + HEADER.size
+            self.sessions.add(bytes(self.buf[start:start + session_len]))
+            self.first_ts = timestamp if self.first_ts is None else self.first_ts
+            self.last_ts = timestamp
+            self.count += 1
+            self.end = end
+    
+    def seek(self, start: Optional[float]) -> int:
+        """Offset of an indexed record at or before the first one >= start"""
+        if start is None or not self.index_times:
+            return 0
+        i = bisect.bisect_left(self.index_times, start) - 1
+        return self.index_offsets[max(i, 0)]
+
+class AuditReader:
+    """Scan the audit log by session and time range without copying payloads"""
+    
+    def __init__(self, directory: str, index_every: int = 64):
+        self.directory = directory
+        self.index_every = index_every
+        self._segments: Dict[str, _Segment] = {}
+    
+    def _refresh(self) -> List[_Segment]:
+        segments = []
+        for name in _list_segments(self.directory):
+            segment = self._segments.get(name)
+            if segment is None:
+                segment = self._segments[name] = _Segment(os.path.join(self.directory, name), self.index_every)
+            segment.refresh()
+            segments.append(segment)
+        return segments
+    
+    def scan(self, session_id: Optional[str] = None, start: Optional[float] = None,
+             end: Optional[float] = None) -> Iterator[AuditRecord]:
+        """Yield records in write order, optionally filtered by session and [start, end] time"""
+        session = session_id.encode("utf-8") if session_id is not None else None
+        for segment in self._refresh():
+            if segment.buf is None or segment.count == 0:
+                continue
+            if session is not None and session not in segment.sessions:
+                continue
+            if (start is not None and segment.last_ts < start) or (end is not None and segment.first_ts > end):
+                continue
+            
+            view = memoryview(segment.buf)
+            for offset, record_end, timestamp, session_len, _ in _valid_records(view[:segment.end], segment.seek(start), verify=False):
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp > end:
+                    break
+                payload = view[offset + HEADER.size:record_end]
+                if session is not None and payload[:session_len] != session:
+                    continue
+                yield AuditRecord(timestamp, payload, session_len)
+    
+    def sessions(self) -> List[str]:
+        """All session ids present in the log"""
+        found = set()
+        for segment in self._refresh():
+            found |= segment.sessions
+        return sorted(s.decode("utf-8") for s in found)
@@ -0,0 +1,62 @@
+"""Report prompt template sizes and, with OPENAI_API_KEY set, time-to-first-token.
+
+    python bench_prompts.py [runs]
+"""
+import os
+import sys
+import time
+
+import openai
+
+from agents import get_registry
+from prompts import PROMPTS, template_report
+
+SAMPLE = {
+    'query': "Help me move into product management", 'skill_analysis': "Strong communication, limited SQL.",
+    'assessment': "Good transferable skills.", 'feedback': "Solid performer, wants more scope.",
+    'role': "Marketing", 'experience': "3-5 years", 'name': "Alex",
+}
+TTFT_TEMPLATES = {
+    'route': "OnboardingAgent",
+    'create_learning_plan': "LearningAgent",
+    'create_development_plan': "LearningAgent",
+}
+
+def time_to_first_token(system: str, prompt: str) -> float:
+    start = time.perf_counter()
+    response = openai.ChatCompletion.create(
+        model="gpt-3.5-turbo",
+        messages=[{"role": "system", "content": system}, {"role": "user", "content": prompt}],
+        temperature=0,
+        max_tokens=1,
+        stream=True
+    )
+    for _ in response:
+        break
+    return time.perf_counter() - start
+
+def main(runs: int = 5):
+    rows = template_report()
+    print(f"Input tokens counted with {rows[0]['tokenizer']} (before = the literal pre-template prompt)")
+    print(f"{'template':<30}{'before':>8}{'after':>8}{'saved %':>9}{'prefix':>8}")
+    for row in rows:
+        before = "-" if row['tokens_before'] is None else row['tokens_before']
+        saved = "-" if row['reduction_pct'] is None else row['reduction_pct']
+        print(f"{row['template']:<30}{before:>8}{row['tokens_after']:>8}"
+              f"{saved:>9}{row['cacheable_prefix_tokens']:>8}")
+    
+    if not os.getenv("OPENAI_API_KEY"):
+        print("\nSet OPENAI_API_KEY to measure time-to-first-token.")
+        return
+    
+    registry = get_registry()
+    print(f"\n{'template':<30}{'TTFT before':>12}{'TTFT after':>12}")
+    for name, agent_name in TTFT_TEMPLATES.items():
+        agent = registry.get(agent_name)
+        template = PROMPTS[name]
+        before = [time_to_first_token(agent.ROLE_DESCRIPTION, template.render_baseline(**SAMPLE)) for _ in range(runs)]
+        after = [time_to_first_token(agent.role_description, template.render(**SAMPLE)) for _ in range(runs)]
+        print(f"{name:<30}{sum(before) / runs:>12.3f}{sum(after) / runs:>12.3f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
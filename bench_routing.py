@@ -0,0 +1,56 @@
+"""Measure the old routing prompt's mean completion length, the baseline for routing savings.
+
+    python bench_routing.py [runs]
+
+Prints the PATHFINDER_BUDGET_BASELINES value to export; needs OPENAI_API_KEY.
+"""
+import json
+import os
+import sys
+
+import openai
+
+from prompts import PROMPTS
+
+# OnboardingAgent's system prompt as it was before label-only routing
+LEGACY_ROLE_DESCRIPTION = """You are an expert career onboarding specialist. Your role is to:
+        1. Analyze career challenges and questions from professionals
+        2. Determine the type of support needed (skill development, career transition, leadership, etc.)
+        3. Route requests to appropriate specialist agents
+        4. Coordinate responses from multiple agents
+        5. Provide initial assessment and context setting
+        
+        You should be empathetic, professional, and strategic in your analysis. Always consider the person's career stage, goals, and immediate needs."""
+
+QUERIES = [
+    "I want to transition from marketing to product management",
+    "How can I improve my leadership skills?",
+    "What skills should I learn for data science?",
+    "I'm stuck in my career, what should I do next?",
+]
+PROFILE = {'role': "Marketing", 'experience': "3-5 years", 'name': "Alex"}
+
+def main(runs: int = 3):
+    if not os.getenv("OPENAI_API_KEY"):
+        print("Set OPENAI_API_KEY to measure the routing baseline.")
+        return
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    
+    lengths = []
+    for query in QUERIES:
+        for _ in range(runs):
+            response = openai.ChatCompletion.create(
+                model="gpt-3.5-turbo",
+                messages=[{"role": "system", "content": LEGACY_ROLE_DESCRIPTION},
+                          {"role": "user", "content": PROMPTS["route"].render_baseline(query=query, **PROFILE)}],
+                temperature=0.3,
+                max_tokens=500
+            )
+            lengths.append(response.usage.completion_tokens)
+    
+    mean = round(sum(lengths) / len(lengths))
+    print(f"{len(lengths)} routing completions, mean {mean} tokens")
+    print(f"export PATHFINDER_BUDGET_BASELINES='{json.dumps({'route': mean})}'")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,44 @@
+"""Benchmark plan generation with and without pipelined validation.
+
+Needs OPENAI_API_KEY; without it every call returns the fallback text
+instantly and the numbers are meaningless.
+
+    python bench_validation.py [runs]
+"""
+import sys
+import time
+
+from agents import get_registry
+from memory import Memory
+from validation import PlanValidation
+
+QUERY = "Help me develop leadership skills for a senior engineering role"
+PROFILE = {'role': 'Software Engineer', 'experience': '5+ years'}
+FEEDBACK = "Strong technical background; limited experience leading teams."
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main(runs: int = 3):
+    registry = get_registry()
+    learning, feedback = registry.learning, registry.feedback
+    
+    modes = {
+        'plain': lambda: learning.create_development_plan(Memory(), QUERY, FEEDBACK, PROFILE),
+        'plain + validate_plan': lambda: feedback.validate_plan(
+            Memory(), learning.create_development_plan(Memory(), QUERY, FEEDBACK, PROFILE), QUERY),
+        'pipelined validation': lambda: learning.create_development_plan(
+            Memory(), QUERY, FEEDBACK, PROFILE, PlanValidation(feedback, QUERY)),
+        'pipelined, 3 candidates': lambda: learning.create_development_plan(
+            Memory(), QUERY, FEEDBACK, PROFILE, PlanValidation(feedback, QUERY, candidates=3)),
+    }
+    
+    print(f"{'mode':<26}{'mean s':>8}{'min s':>8}")
+    for name, fn in modes.items():
+        times = [timed(fn) for _ in range(runs)]
+        print(f"{name:<26}{sum(times) / runs:>8.2f}{min(times):>8.2f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+# The fixed cap every call used before per-method budgets
+DEFAULT_MAX_TOKENS = 500
+
+# Starting output budget (also the ceiling) and stop sequences per agent method
+METHOD_BUDGETS = {
+    'route': {'max_tokens': 8, 'stop': ["\n"]},
+    'validate_section': {'max_tokens': 120},
+    'analyze_situation': {'max_tokens': 450},
+    'assess_transition_readiness': {'max_tokens': 450},
+    'validate_plan': {'max_tokens': 400},
+    'analyze_skills': {'max_tokens': 500},
+    'predict_future_skills': {'max_tokens': 450},
+    'create_learning_plan': {'max_tokens': 500},
+    'create_transition_plan': {'max_tokens': 500},
+    'create_development_plan': {'max_tokens': 500},
+}
+
+# Methods that ran with the fixed cap before budgets existed; savings are only
+# measured against calls that really would have run longer under that cap
+LEGACY_METHODS = {
+    'analyze_situation', 'assess_transition_readiness', 'validate_plan', 'analyze_skills',
+    'predict_future_skills', 'create_learning_plan', 'create_transition_plan', 'create_development_plan',
+}
+
+def _load_baselines() -> Dict[str, float]:
+    """Mean completion tokens per method under its old prompt, from
+    PATHFINDER_BUDGET_BASELINES, e.g. '{"route": 212}' (see bench_routing.py)"""
+    try:
+        return json.loads(os.getenv("PATHFINDER_BUDGET_BASELINES", "{}"))
+    except ValueError:
+        return {}
+
+class OutputBudgets:
+    """Per-method max_tokens that adapt to observed completion lengths
+    
+    Once a method has `min_samples` completions, its budget becomes the
+    95th-percentile length plus `headroom`, never above the configured
+    ceiling and never below `floor`. Calls degraded by a quota are kept out
+    of the window so one tenant's shrunken answers don't shrink everyone's.
+    """
+    
+    def __init__(self, window: int = 100, min_samples: int = 20,
+                 headroom: float = 1.25, floor: int = 16,
+                 baselines: Optional[Dict[str, float]] = None):
+        self.window = window
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.floor = floor
+        self.baselines = baselines if baselines is not None else _load_baselines()
+        self._lengths: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._agent_stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'calls': 0, 'seconds': 0.0, 'completion_tokens': 0, 'degraded_calls': 0,
+                     'cut_calls': 0, 'cut_tokens': 0, 'baseline_tokens': 0.0})
+        self._lock = threading.Lock()
+    
+    def params(self, method: str) -> Dict:
+        """max_tokens (and stop, if any) to send for a method"""
+        config = METHOD_BUDGETS.get(method, {})
+        ceiling = config.get('max_tokens', DEFAULT_MAX_TOKENS)
+        max_tokens = ceiling
+        
+        with self._lock:
+            lengths = sorted(self._lengths[method]) if method in self._lengths else []
+        if len(lengths) >= self.min_samples:
+            p95 = lengths[min(len(lengths) - 1, int(len(lengths) * 0.95))]
+            max_tokens = min(ceiling, max(self.floor, int(p95 * self.headroom)))
+        
+        params = {'max_tokens': max_tokens}
+        if config.get('stop'):
+            params['stop'] = config['stop']
+        return params
+    
+    def record(self, agent: str, method: str, completion_tokens: int, seconds: float,
+               max_tokens: Optional[int] = None, finish_reason: Optional[str] = None,
+               degraded: bool = False) -> None:
+        """Record one completion's length and latency
+        
+        `degraded` marks calls whose budget was shrunk by a quota rather than
+        set by params(); they are counted but never feed the adaptive window
+        or the savings figures. A completion counts as cut by its budget only
+        when the provider reports finish_reason "length" under a max_tokens
+        below the old fixed cap, i.e. the model was not done and the old cap
+        would have let it continue.
+        """
+        cut = (not degraded and finish_reason == "length" and method in LEGACY_METHODS
+               and max_tokens is not None and max_tokens < DEFAULT_MAX_TOKENS)
+        with self._lock:
+            stats = self._agent_stats[agent]
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['completion_tokens'] += completion_tokens
+            if degraded:
+                stats['degraded_calls'] += 1
+                return
+            self._lengths[method].append(completion_tokens)
+            if cut:
+                stats['cut_calls'] += 1
+                stats['cut_tokens'] += DEFAULT_MAX_TOKENS - completion_tokens
+            if method in self.baselines:
+                stats['baseline_tokens'] += max(0.0, self.baselines[method] - completion_tokens)
+    
+    def report(self) -> List[Dict]:
+        """Per-agent latency summary
+        
+        max_seconds_saved covers only completions cut by a budget below the
+        old cap. For those, it is the tokens the old cap would still have
+        allowed times the agent's observed seconds per generated token. That
+        is an upper bound, since the model may have finished sooner.
+        
+        seconds_saved_vs_baseline covers methods with a measured baseline
+        (the mean completion length under their old prompt, e.g. routing):
+        the tokens below that mean times the seconds per token across all
+        agents, since a few-token completion's own rate is mostly overhead.
+        """
+        with self._lock:
+            total_tokens = sum(stats['completion_tokens'] for stats in self._agent_stats.values())
+            total_seconds = sum(stats['seconds'] for stats in self._agent_stats.values())
+            overall_per_token = total_seconds / total_tokens if total_tokens else 0.0
+            rows = []
+            for agent, stats in sorted(self._agent_stats.items()):
+                per_token = stats['seconds'] / stats['completion_tokens'] if stats['completion_tokens'] else 0.0
+                rows.append({
+                    'agent': agent,
+                    'calls': stats['calls'],
+                    'avg_seconds': round(stats['seconds'] / stats['calls'], 2),
+                    'avg_completion_tokens': round(stats['completion_tokens'] / stats['calls']),
+                    'degraded_by_quota': stats['degraded_calls'],
+                    'cut_by_budget': stats['cut_calls'],
+                    'max_seconds_saved': round(stats['cut_tokens'] * per_token, 1),
+                    'seconds_saved_vs_baseline': round(stats['baseline_tokens'] * overall_per_token, 1),
+                })
+            return rows
+
+output_budgets = OutputBudgets()
+
+def route_label(text: str) -> Optional[str]:
+    """Map a routing completion to SKILL, TRANSITION or GENERAL"""
+    text = text.upper()
+    for label in ("SKILL", "TRANSITION", "GENERAL"):
+        if label in text:
+            return label
+    return None
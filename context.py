@@ -0,0 +1,140 @@
+import re
+from typing import Dict, List, Optional
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token for English text)"""
+    return len(text) // 4 + 1 if text else 0
+
+def _shorten(text: str, limit: int) -> str:
+    """Collapse whitespace and cut text to at most `limit` characters"""
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+def _first_point(response: str) -> str:
+    """First substantive line of an agent response, without markdown decoration"""
+    for line in response.splitlines():
+        line = line.strip()
+        # Skip headings, rules and the italic footer the agents append
+        if not line or line.startswith(("#", "---", "*This")):
+            continue
+        line = line.replace("**", "").lstrip("*-0123456789. ").strip("_ ")
+        if line:
+            return line
+    return ""
+
+_TARGET_PATTERNS = [
+    re.compile(r"\bfrom ([\w /&+-]{2,40}?) to ([\w /&+-]{2,40}?)(?:[.,!?]|$| and | with )", re.I),
+    re.compile(r"\b(?:transition|move|switch|pivot)(?:ing)? (?:in)?to ([\w /&+-]{2,40}?)(?:[.,!?]|$| and | with )", re.I),
+]
+_SKILL_PATTERN = re.compile(r"\b((?:[\w/+-]+ ){0,2}[\w/+-]+) skills\b", re.I)
+# Words that can sit next to "skills" without naming one: determiners,
+# pronouns, conjunctions and the verbs people put in front of a skill
+_SKILL_STOPWORDS = {
+    'a', 'an', 'the', 'my', 'your', 'our', 'their', 'his', 'her', 'its', 'me', 'i', 'we', 'you',
+    'some', 'any', 'more', 'new', 'current', 'existing', 'key', 'core', 'other', 'these', 'those',
+    'and', 'or', 'of', 'in', 'on', 'for', 'to', 'with', 'at', 'by', 'about', 'what', 'which',
+    'better', 'good', 'improve', 'improving', 'develop', 'developing', 'build', 'building',
+    'learn', 'learning', 'analyze', 'analyse', 'analyzing', 'assess', 'assessing', 'boost',
+    'strengthen', 'grow', 'growing', 'gain', 'enhance', 'get', 'need', 'want', 'have', 'use',
+    'help', 'level', 'up', 'brush', 'sharpen', 'master', 'evaluate', 'review', 'identify', 'should',
+}
+
+def _skill_phrase(words: str) -> str:
+    """Words before "skills" with leading and trailing filler removed"""
+    tokens = words.split()
+    while tokens and tokens[0].lower() in _SKILL_STOPWORDS:
+        tokens.pop(0)
+    while tokens and tokens[-1].lower() in _SKILL_STOPWORDS:
+        tokens.pop()
+    return " ".join(tokens)
+
+class RollingContext:
+    """Compressed, token-bounded summary of earlier turns and what we learned about the user"""
+    
+    def __init__(self, token_budget: int = 300, max_turns: int = 4, max_topics: int = 8):
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.max_topics = max_topics
+        self.turns: List[str] = []
+        self.earlier_topics: List[str] = []
+        self.insights: Dict[str, str] = {}
+    
+    def record_turn(self, query: str, response: str, user_profile: Optional[Dict] = None) -> None:
+        """Fold a finished turn into the summary; pure string work, no LLM call"""
+        self._extract_insights(query, user_profile)
+        
+        digest = f'Asked "{_shorten(query, 120)}"'
+        point = _first_point(response)
+        if point:
+            digest += f" -> advised: {_shorten(point, 160)}"
+        self.turns.append(digest)
+        
+        # Older turns collapse into short topic labels
+        while len(self.turns) > self.max_turns:
+            oldest = self.turns.pop(0)
+            topic = _shorten(oldest.split('"')[1] if '"' in oldest else oldest, 50)
+            self.earlier_topics.append(topic)
+        del self.earlier_topics[:-self.max_topics]
+    
+    def _extract_insights(self, query: str, user_profile: Optional[Dict]) -> None:
+        """Pull lightweight facts about the user out of the query and profile"""
+        if user_profile:
+            for key in ('role', 'experience'):
+                if user_profile.get(key):
+                    self.insights[key] = user_profile[key]
+        
+        for pattern in _TARGET_PATTERNS:
+            match = pattern.search(query)
+            if match:
+                groups = [g.strip() for g in match.groups()]
+                if len(groups) == 2:
+                    self.insights['background'] = groups[0]
+                self.insights['target'] = groups[-1]
+                break
+        
+        skills = [phrase for phrase in map(_skill_phrase, _SKILL_PATTERN.findall(query)) if phrase]
+        if skills:
+            known = self.insights.get('skill_focus', "")
+            merged = [s for s in known.split(", ") if s] + [s for s in skills if s not in known]
+            self.insights['skill_focus'] = ", ".join(merged[-5:])
+    
+    def sync_to_memory(self, memory) -> None:
+        """Store insights and the rendered summary on a request's Memory"""
+        for key, value in self.insights.items():
+            memory.add_user_insight(key, value)
+        memory.set_conversation_context('summary', self.render())
+    
+    def render(self) -> str:
+        """Summary text guaranteed to fit within token_budget"""
+        sections = []
+        if self.insights:
+            sections.append("Known about the user: " + "; ".join(f"{k}: {v}" for k, v in self.insights.items()))
+        if self.earlier_topics:
+            sections.append("Earlier topics: " + "; ".join(self.earlier_topics))
+        if self.turns:
+            sections.append("Recent turns:\n" + "\n".join(f"- {t}" for t in self.turns))
+        text = "\n".join(sections)
+        
+        # Drop the oldest material first until the summary fits
+        topics, turns = list(self.earlier_topics), list(self.turns)
+        while estimate_tokens(text) > self.token_budget and (topics or turns):
+            if topics:
+                topics.pop(0)
+            else:
+                turns.pop(0)
+            sections = sections[:1] if self.insights else []
+            if topics:
+                sections.append("Earlier topics: " + "; ".join(topics))
+            if turns:
+                sections.append("Recent turns:\n" + "\n".join(f"- {t}" for t in turns))
+            text = "\n".join(sections)
+        
+        if estimate_tokens(text) > self.token_budget:
+            text = text[:self.token_budget * 4 - 4]
+        return text
+    
+    def clear(self) -> None:
+        """Forget everything, e.g. when the user changes their role or experience"""
+        self.turns = []
+        self.earlier_topics = []
+        self.insights = {}
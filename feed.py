@@ -0,0 +1,90 @@
+import streamlit as st
+from typing import Dict, List, Optional
+
+# Icon and accent colour per agent, built once instead of per log entry
+AGENT_STYLES = {
+    "OnboardingAgent": ("🚪", "#e74c3c"),
+    "LearningAgent": ("📚", "#3498db"),
+    "FeedbackAgent": ("💬", "#f39c12"),
+    "SkillAnalysisAgent": ("🔬", "#9b59b6"),
+}
+DEFAULT_STYLE = ("🤖", "#95a5a6")
+
+def render_entry(entry: Dict, ai_indicator: str) -> str:
+    """Render a single detailed log entry as an agent card"""
+    agent_name = entry['agent']
+    icon, color = AGENT_STYLES.get(agent_name, DEFAULT_STYLE)
+    return (
+        f'<div class="agent-card" style="border-left-color: {color};">'
+        f'<strong>{icon} {agent_name}</strong> '
+        f'<span style="color: green; font-size: 0.8em;">{ai_indicator}</span>'
+        f'<small style="color: gray; float: right;">{entry["timestamp"]}</small><br>'
+        f'{entry["message"]}'
+        f'</div>'
+    )
+
+class ActivityFeed:
+    """Session-wide agent activity feed that only renders log entries it has not seen yet
+    
+    app.py starts a fresh Memory for every query, so the feed keeps its own
+    rendered cards across queries: a new Memory only resets the cursor into
+    that Memory's log. Reruns that don't run a query draw the cached HTML
+    without touching any log entries.
+    """
+    
+    def __init__(self, page_size: int = 20, max_history: int = 200):
+        self.page_size = page_size
+        self.max_history = max_history
+        self.cursor = 0
+        self.cards: List[str] = []
+        self.dropped = 0
+        self._memory = None
+        self._ai_indicator = None
+        self._html = None
+    
+    def sync(self, memory, ai_indicator: str) -> None:
+        """Render entries added to memory since the last sync"""
+        if ai_indicator != self._ai_indicator:
+            # Cards embed the AI/demo badge, so a mode change invalidates them
+            self._ai_indicator = ai_indicator
+            self.cards = []
+            self.dropped = 0
+            self._memory = None
+        if memory is not self._memory:
+            # Next query's Memory: keep earlier cards, read its log from the start
+            self._memory = memory
+            self.cursor = 0
+        
+        new_entries = memory.get_entries_since(self.cursor)
+        if not new_entries:
+            return
+        self.cards.extend(render_entry(entry, ai_indicator) for entry in new_entries)
+        self.cursor += len(new_entries)
+        
+        excess = len(self.cards) - self.page_size - self.max_history
+        if excess > 0:
+            del self.cards[:excess]
+            self.dropped += excess
+        self._html = None
+    
+    def _joined(self):
+        """(history HTML, latest page HTML), joined once per change to the cards"""
+        if self._html is None:
+            split = max(0, len(self.cards) - self.page_size)
+            self._html = ("".join(self.cards[:split]), "".join(self.cards[split:]))
+        return self._html
+    
+    def render(self, memory=None, ai_indicator: Optional[str] = None) -> None:
+        """Sync with memory if given, then draw the feed with one markdown call per section"""
+        if memory is not None:
+            self.sync(memory, ai_indicator)
+        
+        history_html, latest_html = self._joined()
+        if history_html:
+            older = len(self.cards) - self.page_size
+            with st.expander(f"Earlier activity ({older} entries)", expanded=False):
+                if self.dropped:
+                    st.caption(f"{self.dropped} older entries not shown")
+                st.markdown(history_html, unsafe_allow_html=True)
+        
+        st.markdown(latest_html, unsafe_allow_html=True)
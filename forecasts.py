@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from memory import Memory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEFRAME = "next 2-3 years"
+DEFAULT_STORE_PATH = os.getenv("PATHFINDER_FORECAST_STORE", os.path.join(".pathfinder_cache", "skill_forecasts.json"))
+
+class SkillForecastService:
+    """Serve predict_future_skills results from a persistent store, refreshing in the background
+    
+    Reads never wait on the LLM: a missing or stale entry is returned as-is
+    (or as None) and a refresh is queued for the scheduler thread.
+    """
+    
+    def __init__(self, skill_agent, roles: List[str], timeframes: Optional[List[str]] = None,
+                 store_path: str = DEFAULT_STORE_PATH, max_age: timedelta = timedelta(days=7),
+                 check_interval: float = 3600.0, retry_delay: float = 900.0, audit_log=None):
+        self.skill_agent = skill_agent
+        # Background refreshes are agent interactions too; audited with no session id
+        self.audit_log = audit_log
+        self.roles = list(roles)
+        self.timeframes = timeframes or [DEFAULT_TIMEFRAME]
+        self.store_path = store_path
+        self.max_age = max_age
+        self.check_interval = check_interval
+        # Seconds to wait before retrying a key whose last refresh failed
+        self.retry_delay = retry_delay
+        self._failed_at: Dict[str, float] = {}
+        self._entries: Dict[str, Dict] = self._load()
+        self._queued: List[tuple] = []
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def _key(role: str, timeframe: str) -> str:
+        return f"{role}|{timeframe}"
+    
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.store_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save(self) -> None:
+        """Write the store atomically so a crash never leaves a half-written file"""
+        with self._lock:
+            data = json.dumps(self._entries, indent=2)
+        directory = os.path.dirname(self.store_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.store_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.store_path)
+    
+    def is_stale(self, entry: Dict) -> bool:
+        return datetime.now() - datetime.fromisoformat(entry['updated_at']) > self.max_age
+    
+    def get(self, role: str, timeframe: str = DEFAULT_TIMEFRAME) -> Optional[Dict]:
+        """Return the stored forecast immediately, queueing a refresh if it is missing or stale
+        
+        Only configured roles are refreshed. The result has 'prediction',
+        'updated_at', 'stale' and 'refreshing' keys.
+        """
+        key = self._key(role, timeframe)
+        with self._lock:
+            entry = self._entries.get(key)
+        
+        stale = entry is None or self.is_stale(entry)
+        if stale and role in self.roles:
+            self.request_refresh(role, timeframe)
+        if entry is None:
+            return None
+        
+        with self._lock:
+            refreshing = key in self._in_flight or (role, timeframe) in self._queued
+        return {**entry, 'stale': stale, 'refreshing': refreshing}
+    
+    def request_refresh(self, role: str, timeframe: str = DEFAULT_TIMEFRAME) -> None:
+        """Queue a background refresh unless one is pending or recently failed"""
+        with self._lock:
+            key = self._key(role, timeframe)
+            if key in self._in_flight or (role, timeframe) in self._queued:
+                return
+            failed_at = self._failed_at.get(key)
+            if failed_at is not None and time.monotonic() - failed_at < self.retry_delay:
+                return
+            self._queued.append((role, timeframe))
+        self._wake.set()
+    
+    def refresh(self, role: str, timeframe: str = DEFAULT_TIMEFRAME) -> bool:
+        """Recompute one forecast synchronously; returns False if the LLM was unavailable"""
+        key = self._key(role, timeframe)
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+        try:
+            prediction = self.skill_agent.predict_future_skills(Memory(self.audit_log), role, timeframe)
+            # Don't overwrite a real forecast with demo-mode or over-quota text
+            if prediction in (self.skill_agent._fallback_response(""), self.skill_agent._quota_response()):
+                with self._lock:
+                    self._failed_at[key] = time.monotonic()
+                return False
+            with self._lock:
+                self._failed_at.pop(key, None)
+                self._entries[key] = {
+                    'role': role,
+                    'timeframe': timeframe,
+                    'prediction': prediction,
+                    'updated_at': datetime.now().isoformat(),
+                }
+            self._save()
+            return True
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+    
+    def _queue_stale(self) -> None:
+        """Queue every configured role/timeframe whose entry is missing or stale"""
+        for role in self.roles:
+            for timeframe in self.timeframes:
+                with self._lock:
+                    entry = self._entries.get(self._key(role, timeframe))
+                if entry is None or self.is_stale(entry):
+                    self.request_refresh(role, timeframe)
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._queue_stale()
+            while not self._stop.is_set():
+                with self._lock:
+                    if not self._queued:
+                        break
+                    role, timeframe = self._queued.pop(0)
+                try:
+                    self.refresh(role, timeframe)
+                except Exception as e:
+                    # e.g. the store is not writable; keep the scheduler alive
+                    logger.warning("Skill forecast refresh for %s failed: %s", role, e)
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+    
+    def start(self) -> "SkillForecastService":
+        """Start the scheduler thread (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="skill-forecast-refresh", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
@@ -3,12 +3,14 @@ import json
 
 class Memory:
     """Enhanced memory system for AI agents with conversation context and insights"""
-    def __init__(self):
+    def __init__(self, audit_log=None):
         self.log = []
         self.detailed_log = []
         self.conversation_context = {}
         self.user_insights = {}
         self.session_start = datetime.now()
+        # Optional AuditLog that receives every add() for compliance retention
+        self.audit_log = audit_log
 
     def add(self, agent, message, metadata=None):
         """Add a message to both simple and detailed logs"""
@@ -27,6 +29,9 @@ class Memory:
         }
         self.detailed_log.append(log_entry)
 
+        if self.audit_log is not None:
+            self.audit_log.append(self.conversation_context.get('session_id', ''), agent, message, metadata)
+
     def get_log(self):
         """Get simple log for backward compatibility"""
         return self.log
@@ -35,6 +40,10 @@ class Memory:
         """Get detailed log with timestamps and metadata"""
         return self.detailed_log
 
+    def get_entries_since(self, cursor):
+        """Get detailed log entries added after the first `cursor` entries"""
+        return self.detailed_log[cursor:]
+
     def add_user_insight(self, key, value):
         """Store insights about the user for personalization"""
         self.user_insights[key] = {
@@ -0,0 +1,297 @@
+import contextvars
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+ENV_VAR = "PATHFINDER_PROFILE"
+TIMERS, SAMPLE = "timers", "sample"
+# PATHFINDER_PROFILE value that lets visitors opt in per request with ?profile=
+ALLOW = "allow"
+
+_current: contextvars.ContextVar = contextvars.ContextVar("pathfinder_profile", default=None)
+_stack: contextvars.ContextVar = contextvars.ContextVar("pathfinder_profile_stack", default=())
+
+_install_lock = threading.Lock()
+_installed = False
+_span_cost = 0.0
+
+def requested_mode(query_value: Optional[str] = None) -> Optional[str]:
+    """Profiling mode for a request: None, "timers" or "sample"
+    
+    Set by the operator through PATHFINDER_PROFILE. The ?profile= value is
+    only honoured when PATHFINDER_PROFILE is "allow", so visitors can't wrap
+    the process or start a sampler on a server that never opted in.
+    """
+    value = os.getenv(ENV_VAR, "").strip().lower()
+    if value == ALLOW:
+        value = (query_value or "").strip().lower()
+    if value in ("", "0", "false", "off", "no"):
+        return None
+    return SAMPLE if value == SAMPLE else TIMERS
+
+class RequestProfile:
+    """Timings collected for one request (one Streamlit script run)"""
+    
+    def __init__(self, name: str, sample_interval: Optional[float] = None):
+        self.name = name
+        self.sample_interval = sample_interval
+        self._totals: Dict[tuple, float] = defaultdict(float)
+        self._calls: Dict[tuple, int] = defaultdict(int)
+        self._samples: Dict[tuple, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.spans = 0
+        self.start = time.perf_counter()
+        self.duration = 0.0
+    
+    def record(self, path: tuple, seconds: float) -> None:
+        with self._lock:
+            self._totals[path] += seconds
+            self._calls[path] += 1
+            self.spans += 1
+    
+    def _start_sampler(self, thread_id: int) -> None:
+        def sample():
+            while not self._stop.wait(self.sample_interval):
+                frame = sys._current_frames().get(thread_id)
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if names:
+                    self._samples[tuple(reversed(names))] += 1
+        
+        self._sampler = threading.Thread(target=sample, name="pathfinder-profile-sampler", daemon=True)
+        self._sampler.start()
+    
+    def finish(self) -> None:
+        if self._stop.is_set():
+            return
+        self.duration = time.perf_counter() - self.start
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+    
+    def _self_times(self) -> Dict[tuple, float]:
+        """Span time minus time spent in child spans"""
+        with self._lock:
+            totals = dict(self._totals)
+        child = defaultdict(float)
+        for path, seconds in totals.items():
+            if len(path) > 1:
+                child[path[:-1]] += seconds
+        return {path: max(0.0, seconds - child[path]) for path, seconds in totals.items()}
+    
+    def folded(self) -> str:
+        """Span tree in collapsed-stack format (microseconds), for flamegraph.pl or speedscope"""
+        root = (self.name,)
+        lines = [f"{';'.join(root + path)} {int(seconds * 1e6)}"
+                 for path, seconds in sorted(self._self_times().items()) if seconds > 0]
+        untracked = self.duration - sum(s for p, s in self._totals.items() if len(p) == 1)
+        if untracked > 0:
+            lines.append(f"{self.name} {int(untracked * 1e6)}")
+        return "\n".join(lines)
+    
+    def folded_samples(self) -> str:
+        """Sampled Python stacks in collapsed-stack format (sample counts)"""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in sorted(self._samples.items()))
+    
+    def breakdown(self) -> List[Dict]:
+        """Per-span totals sorted by self time"""
+        self_times = self._self_times()
+        rows = defaultdict(lambda: {'calls': 0, 'total_ms': 0.0, 'self_ms': 0.0})
+        for path, seconds in self._totals.items():
+            row = rows[path[-1]]
+            row['calls'] += self._calls[path]
+            # Recursive or re-entrant spans would double count their total time
+            if path[-1] not in path[:-1]:
+                row['total_ms'] += seconds * 1000
+            row['self_ms'] += self_times[path] * 1000
+        
+        total_ms = self.duration * 1000 or 1.0
+        return sorted(({
+            'span': name,
+            'calls': row['calls'],
+            'total_ms': round(row['total_ms'], 2),
+            'self_ms': round(row['self_ms'], 2),
+            'pct_of_request': round(100 * row['total_ms'] / total_ms, 1),
+        } for name, row in rows.items()), key=lambda r: r['self_ms'], reverse=True)
+    
+    def overhead_pct(self) -> float:
+        """Estimated share of the request spent in the timers themselves"""
+        return 100 * self.spans * _span_cost / self.duration if self.duration else 0.0
+    
+    def flame_figure(self):
+        """Icicle chart of the span tree (plotly)"""
+        import plotly.graph_objects as go
+        
+        with self._lock:
+            totals = dict(self._totals)
+        ids, labels, parents, values = [self.name], [self.name], [""], [self.duration]
+        for path, seconds in sorted(totals.items()):
+            ids.append("/".join((self.name,) + path))
+            labels.append(path[-1])
+            parents.append("/".join((self.name,) + path[:-1]))
+            values.append(seconds)
+        return go.Figure(go.Icicle(ids=ids, labels=labels, parents=parents, values=values,
+                                   branchvalues="total", tiling=dict(orientation="v")))
+
+@contextmanager
+def span(name: str):
+    """Time a block as a child of the current span; a no-op outside a profiled request"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    path = _stack.get() + (name,)
+    token = _stack.set(path)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.record(path, time.perf_counter() - start)
+        _stack.reset(token)
+
+def _wrap(fn, name: str):
+    if getattr(fn, "__profiled__", False):
+        return fn
+    
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                yield from fn(*args, **kwargs)
+                return
+            # Only time spent inside the generator counts, not the consumer's work between items
+            path = _stack.get() + (name,)
+            gen = fn(*args, **kwargs)
+            elapsed = 0.0
+            try:
+                while True:
+                    token = _stack.set(path)
+                    start = time.perf_counter()
+                    try:
+                        item = next(gen)
+                    except StopIteration as stop:
+                        return stop.value
+                    finally:
+                        elapsed += time.perf_counter() - start
+                        _stack.reset(token)
+                    yield item
+            finally:
+                gen.close()
+                profile.record(path, elapsed)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return fn(*args, **kwargs)
+            path = _stack.get() + (name,)
+            token = _stack.set(path)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.record(path, time.perf_counter() - start)
+                _stack.reset(token)
+    
+    wrapper.__profiled__ = True
+    return wrapper
+
+def _wrap_methods(cls, names: Optional[List[str]] = None) -> None:
+    for attr, value in list(vars(cls).items()):
+        if names is not None and attr not in names:
+            continue
+        if names is None and (attr.startswith("__") or not inspect.isfunction(value)):
+            continue
+        setattr(cls, attr, _wrap(value, f"{cls.__name__}.{attr}"))
+
+def _calibrate(iterations: int = 2000) -> float:
+    """Seconds a single timed call costs on top of the untimed call"""
+    def noop():
+        pass
+    
+    timed = _wrap(noop, "calibrate")
+    profile = RequestProfile("calibrate")
+    token = _current.set(profile)
+    try:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            timed()
+        wrapped = time.perf_counter() - start
+    finally:
+        _current.reset(token)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        noop()
+    return max(0.0, (wrapped - (time.perf_counter() - start)) / iterations)
+
+def install() -> None:
+    """Wrap the pipeline's hot paths with timers
+    
+    Done lazily the first time profiling is requested, so a process that
+    never profiles runs the original, unwrapped functions.
+    """
+    global _installed, _span_cost
+    with _install_lock:
+        if _installed:
+            return
+        import openai
+        from agents import AIAgent, OnboardingAgent, LearningAgent, FeedbackAgent, SkillAnalysisAgent
+        from memory import Memory
+        from prompts import PromptTemplate
+        from feed import ActivityFeed
+        
+        _wrap_methods(AIAgent, ["_build_messages", "_admit", "_make_llm_call", "_stream_llm_call"])
+        for cls in (OnboardingAgent, LearningAgent, FeedbackAgent, SkillAnalysisAgent, Memory):
+            _wrap_methods(cls)
+        _wrap_methods(PromptTemplate, ["render"])
+        _wrap_methods(ActivityFeed, ["render"])
+        # Time spent waiting on the provider, separate from the agent code around it
+        openai.ChatCompletion.create = _wrap(openai.ChatCompletion.create, "network: openai.ChatCompletion.create")
+        
+        _span_cost = _calibrate()
+        _installed = True
+
+def close_stale_request() -> None:
+    """Finish a profile left active by a run that never reached finish_request()
+    
+    Streamlit aborts script runs with RerunException/StopException, so a
+    profiled run can end without its finish_request(). Call this at the start
+    of every run so later unprofiled runs on the same thread stop recording
+    and the sampler thread is shut down.
+    """
+    profile = _current.get()
+    if profile is not None:
+        profile.finish()
+        _current.set(None)
+        _stack.set(())
+
+def start_request(name: str, mode: str = TIMERS, sample_interval: float = 0.005) -> RequestProfile:
+    """Begin profiling the current request; pair with finish_request()"""
+    close_stale_request()
+    install()
+    profile = RequestProfile(name, sample_interval if mode == SAMPLE else None)
+    profile._token = _current.set(profile)
+    if mode == SAMPLE:
+        profile._start_sampler(threading.get_ident())
+    return profile
+
+def finish_request(profile: RequestProfile) -> RequestProfile:
+    profile.finish()
+    _current.reset(profile._token)
+    return profile
+
+def submit(executor, fn, *args, **kwargs):
+    """executor.submit that keeps worker-thread spans inside the current request"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,403 @@
+import functools
+import inspect
+import re
+from typing import Dict, List, Optional
+
+from context import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:  # optional, only used by template_report()
+    tiktoken = None
+
+def compact(text: str) -> str:
+    """Dedent, strip trailing whitespace and collapse runs of blank lines"""
+    lines = [line.rstrip() for line in inspect.cleandoc(text).splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+class PromptTemplate:
+    """Prompt split into a static instruction prefix and a short per-call tail
+    
+    The prefix is compacted once at import time. Keeping it first, right after
+    the agent's system prompt, gives every call to the same method an
+    identical leading run of tokens that providers can cache.
+    """
+    
+    def __init__(self, name: str, instructions: str, fields: str, defaults: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.prefix = compact(instructions)
+        self.fields = compact(fields)
+        self.defaults = defaults or {}
+    
+    def _values(self, user_profile: Optional[Dict], values: Dict) -> Dict:
+        merged = dict(self.defaults)
+        if user_profile:
+            merged.update({k: v for k, v in user_profile.items() if k in self.defaults and v})
+        merged.update(values)
+        return merged
+    
+    def render(self, user_profile: Optional[Dict] = None, **values) -> str:
+        """Build the prompt; profile fields fall back to this template's defaults"""
+        return f"{self.prefix}\n\n{self.fields.format(**self._values(user_profile, values))}"
+    
+    def render_baseline(self, user_profile: Optional[Dict] = None, **values) -> Optional[str]:
+        """Build the literal prompt this template replaced, if there was one"""
+        baseline = BASELINE_PROMPTS.get(self.name)
+        return baseline.format(**self._values(user_profile, values)) if baseline is not None else None
+
+PROMPTS = {t.name: t for t in [
+    PromptTemplate("route", """
+        Classify the main type of the career challenge below. Answer with exactly one label and nothing else:
+        SKILL - skill development or learning
+        TRANSITION - changing role, field or career
+        GENERAL - leadership, assessment or other development
+        """, """
+        User Query: "{query}"
+        User Profile:
+        - Role: {role}
+        - Experience: {experience}
+        - Name: {name}
+        """, {'role': 'Not specified', 'experience': 'Not specified', 'name': 'User'}),
+    
+    PromptTemplate("create_learning_plan", """
+        Based on the career challenge and skill analysis below, create a detailed learning plan.
+        
+        Please create a comprehensive learning plan that includes:
+        1. 3-4 key learning objectives
+        2. Specific resources and activities for each objective
+        3. Realistic timeline (4-8 weeks)
+        4. Success metrics and milestones
+        5. Practical application opportunities
+        
+        Make it actionable and specific to their situation.
+        """, """
+        Challenge: "{query}"
+        Skill Analysis: {skill_analysis}
+        User Background: {role} with {experience} experience
+        """, {'role': 'Professional', 'experience': 'some'}),
+    
+    PromptTemplate("create_transition_plan", """
+        Create a strategic career transition plan for the professional below.
+        
+        Design a transition roadmap with:
+        1. Phase-by-phase approach (3 phases over 8-12 weeks)
+        2. Skill development priorities
+        3. Networking and positioning strategies
+        4. Portfolio/credential building
+        5. Market entry tactics
+        
+        Be specific about actions they can take immediately.
+        """, """
+        Transition Goal: "{query}"
+        Current Assessment: {assessment}
+        Background: {role}
+        """, {'role': 'Current professional'}),
+    
+    PromptTemplate("create_development_plan", """
+        Create a professional development plan for the career challenge below.
+        
+        Design a development strategy that includes:
+        1. Short-term goals (next 2-4 weeks)
+        2. Medium-term objectives (2-3 months)
+        3. Skill building activities
+        4. Performance improvement tactics
+        5. Career positioning strategies
+        
+        Focus on practical, high-impact actions.
+        """, """
+        Challenge: "{query}"
+        Situation Analysis: {feedback}
+        Professional Level: {experience}
+        """, {'experience': 'Mid-level'}),
+    
+    PromptTemplate("analyze_situation", """
+        Analyze the career situation of the professional below and provide coaching feedback.
+        
+        Provide a realistic assessment that covers:
+        1. Current situation analysis
+        2. Key strengths they can leverage
+        3. Areas that need development
+        4. Market/industry context
+        5. Recommended next steps
+        
+        Be supportive but honest about challenges and opportunities.
+        """, """
+        Challenge/Question: "{query}"
+        Current Role: {role}
+        Experience Level: {experience}
+        """, {'role': 'Professional', 'experience': 'Mid-level'}),
+    
+    PromptTemplate("assess_transition_readiness", """
+        Assess the readiness of the professional below for a career transition.
+        
+        Evaluate and provide feedback on:
+        1. Transferable skills and strengths
+        2. Skill gaps that need addressing
+        3. Market timing and opportunities
+        4. Transition challenges to expect
+        5. Readiness score (1-10) with reasoning
+        
+        Be realistic about the transition difficulty and timeline.
+        """, """
+        Desired Transition: "{query}"
+        Current Background: {role} with {experience} experience
+        """, {'role': 'Professional', 'experience': 'some'}),
+    
+    PromptTemplate("validate_plan", """
+        Review and validate the career development plan below.
+        
+        Provide validation feedback on:
+        1. Plan completeness and relevance
+        2. Realistic timeline and expectations
+        3. Potential gaps or oversights
+        4. Success probability assessment
+        5. Suggested improvements or additions
+        
+        Give constructive feedback to optimize the plan.
+        """, """
+        Original Challenge: "{original_query}"
+        Proposed Plan: {plan}
+        """),
+    
+    PromptTemplate("validate_section", """
+        Review the section of a career development plan below.
+        In 2-3 sentences, note any gaps, unrealistic expectations or improvements.
+        End with a line of the form "Score: N/10" rating the section's quality and relevance.
+        """, """
+        Original Challenge: "{original_query}"
+        Plan Section: {section}
+        """),
+    
+    PromptTemplate("analyze_skills", """
+        Conduct a comprehensive skill analysis for the professional below.
+        
+        Provide a detailed skill analysis including:
+        1. Current skill strengths (based on role/experience)
+        2. Skills required for their goal/challenge
+        3. Critical skill gaps (high priority)
+        4. Nice-to-have skills (medium priority)
+        5. Industry trends affecting skill requirements
+        6. Recommended skill development sequence
+        
+        Be specific about technical and soft skills, and consider future market trends.
+        """, """
+        Career Challenge/Goal: "{query}"
+        Current Role: {role}
+        Experience: {experience}
+        """, {'role': 'Professional', 'experience': 'Mid-level'}),
+    
+    PromptTemplate("predict_future_skills", """
+        Predict the evolving skill requirements for the role and timeframe below.
+        
+        Consider:
+        1. Technology trends affecting this role
+        2. Industry evolution and market changes
+        3. Automation impact on required skills
+        4. Emerging competencies becoming important
+        5. Skills that may become less relevant
+        
+        Provide strategic insights for skill development planning.
+        """, """
+        Role: {role}
+        Timeframe: {timeframe}
+        """),
+]}
+
+# The literal prompts used before templates, placeholders in place of the
+# f-string expressions; only for before/after reports
+BASELINE_PROMPTS = {
+    'route': """
+        User Query: "{query}"
+        
+        User Profile:
+        - Role: {role}
+        - Experience: {experience}
+        - Name: {name}
+        
+        Please analyze this career challenge and:
+        1. Identify the main type of challenge (transition, skill development, leadership, assessment, etc.)
+        2. Suggest which specialist agents should be involved
+        3. Provide initial insights and direction
+        
+        Respond in a structured format with your analysis.
+        """,
+    
+    'create_learning_plan': """
+        Based on this career challenge and skill analysis, create a detailed learning plan:
+        
+        Challenge: "{query}"
+        Skill Analysis: {skill_analysis}
+        User Background: {role} with {experience} experience
+        
+        Please create a comprehensive learning plan that includes:
+        1. 3-4 key learning objectives
+        2. Specific resources and activities for each objective
+        3. Realistic timeline (4-8 weeks)
+        4. Success metrics and milestones
+        5. Practical application opportunities
+        
+        Make it actionable and specific to their situation.
+        """,
+    
+    'create_transition_plan': """
+        Create a strategic career transition plan for this professional:
+        
+        Transition Goal: "{query}"
+        Current Assessment: {assessment}
+        Background: {role}
+        
+        Design a transition roadmap with:
+        1. Phase-by-phase approach (3 phases over 8-12 weeks)
+        2. Skill development priorities
+        3. Networking and positioning strategies
+        4. Portfolio/credential building
+        5. Market entry tactics
+        
+        Be specific about actions they can take immediately.
+        """,
+    
+    'create_development_plan': """
+        Create a professional development plan for this career challenge:
+        
+        Challenge: "{query}"
+        Situation Analysis: {feedback}
+        Professional Level: {experience}
+        
+        Design a development strategy that includes:
+        1. Short-term goals (next 2-4 weeks)
+        2. Medium-term objectives (2-3 months)
+        3. Skill building activities
+        4. Performance improvement tactics
+        5. Career positioning strategies
+        
+        Focus on practical, high-impact actions.
+        """,
+    
+    'analyze_situation': """
+        Analyze this professional's career situation and provide coaching feedback:
+        
+        Challenge/Question: "{query}"
+        Current Role: {role}
+        Experience Level: {experience}
+        
+        Provide a realistic assessment that covers:
+        1. Current situation analysis
+        2. Key strengths they can leverage
+        3. Areas that need development
+        4. Market/industry context
+        5. Recommended next steps
+        
+        Be supportive but honest about challenges and opportunities.
+        """,
+    
+    'assess_transition_readiness': """
+        Assess this professional's readiness for career transition:
+        
+        Desired Transition: "{query}"
+        Current Background: {role} with {experience} experience
+        
+        Evaluate and provide feedback on:
+        1. Transferable skills and strengths
+        2. Skill gaps that need addressing
+        3. Market timing and opportunities
+        4. Transition challenges to expect
+        5. Readiness score (1-10) with reasoning
+        
+        Be realistic about the transition difficulty and timeline.
+        """,
+    
+    'validate_plan': """
+        Review and validate this career development plan:
+        
+        Original Challenge: "{original_query}"
+        Proposed Plan: {plan}
+        
+        Provide validation feedback on:
+        1. Plan completeness and relevance
+        2. Realistic timeline and expectations
+        3. Potential gaps or oversights
+        4. Success probability assessment
+        5. Suggested improvements or additions
+        
+        Give constructive feedback to optimize the plan.
+        """,
+    
+    'analyze_skills': """
+        Conduct a comprehensive skill analysis for this professional:
+        
+        Career Challenge/Goal: "{query}"
+        Current Role: {role}
+        Experience: {experience}
+        
+        Provide a detailed skill analysis including:
+        1. Current skill strengths (based on role/experience)
+        2. Skills required for their goal/challenge
+        3. Critical skill gaps (high priority)
+        4. Nice-to-have skills (medium priority)
+        5. Industry trends affecting skill requirements
+        6. Recommended skill development sequence
+        
+        Be specific about technical and soft skills, and consider future market trends.
+        """,
+    
+    'predict_future_skills': """
+        Predict the evolving skill requirements for {role} over the {timeframe}:
+        
+        Consider:
+        1. Technology trends affecting this role
+        2. Industry evolution and market changes
+        3. Automation impact on required skills
+        4. Emerging competencies becoming important
+        5. Skills that may become less relevant
+        
+        Provide strategic insights for skill development planning.
+        """,
+}
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    """gpt-3.5-turbo's tokenizer, or None without tiktoken or its (downloaded) vocabulary"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model("gpt-3.5-turbo")
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    """Input tokens with the real tokenizer when available, else the ~4 chars/token estimate"""
+    encoding = _encoding()
+    return len(encoding.encode(text)) if encoding is not None else estimate_tokens(text)
+
+def template_report(sample_values: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """Input tokens per template, the literal baseline prompt vs the template
+    
+    Variable fields are filled with `sample_values` (short placeholders by
+    default), so the numbers reflect the template overhead rather than user text.
+    Without tiktoken the counts are a character estimate that treats
+    indentation as tokens, so they overstate what whitespace removal saves;
+    the 'tokenizer' column says which was used. The route baseline is the old
+    free-form analysis prompt, so its row includes the rewording too.
+    """
+    sample = {
+        'query': "Help me move into product management", 'skill_analysis': "...", 'assessment': "...",
+        'feedback': "...", 'plan': "...", 'section': "...", 'original_query': "...",
+        'role': "Marketing", 'experience': "3-5 years", 'name': "Alex", 'timeframe': "next 2-3 years",
+    }
+    sample.update(sample_values or {})
+    
+    tokenizer = "tiktoken" if _encoding() is not None else "estimate"
+    rows = []
+    for template in PROMPTS.values():
+        baseline = template.render_baseline(**sample)
+        before = count_tokens(baseline) if baseline is not None else None
+        after = count_tokens(template.render(**sample))
+        rows.append({
+            'template': template.name,
+            'tokens_before': before,
+            'tokens_after': after,
+            'reduction_pct': round(100 * (before - after) / before, 1) if before else None,
+            'cacheable_prefix_tokens': count_tokens(template.prefix),
+            'tokenizer': tokenizer,
+        })
+    return rows
@@ -0,0 +1,150 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import profiling
+
+SCORE_PATTERN = re.compile(r"Score:\s*(\d+(?:\.\d+)?)\s*/\s*10", re.I)
+
+class SectionSplitter:
+    """Split streamed plan text into sections as soon as each one is complete"""
+    
+    # Markdown headings always start a new section; an unindented bold lead-in
+    # ("**Goals**" or "1. **Goals**") does only while the plan has no headings.
+    # Plain list items stay with the heading they belong to.
+    HEADING = re.compile(r"^#{1,6}\s")
+    LEAD_IN = re.compile(r"^(\*\*|\d+\.\s+\*\*)")
+    
+    def __init__(self, min_chars: int = 80):
+        self.min_chars = min_chars
+        self._pending = ""
+        self._section: List[str] = []
+        self._seen_heading = False
+    
+    def feed(self, chunk: str) -> List[str]:
+        """Add streamed text, returning any sections that are now complete"""
+        self._pending += chunk
+        *lines, self._pending = self._pending.split("\n")
+        completed = []
+        for line in lines:
+            section = self._add_line(line)
+            if section:
+                completed.append(section)
+        return completed
+    
+    def flush(self) -> Optional[str]:
+        """Return whatever is left once the stream has ended"""
+        if self._pending:
+            self._section.append(self._pending)
+            self._pending = ""
+        section = "\n".join(self._section).strip()
+        self._section = []
+        return section or None
+    
+    def _add_line(self, line: str) -> Optional[str]:
+        completed = None
+        current = "\n".join(self._section).strip()
+        if self.HEADING.match(line):
+            self._seen_heading = True
+            boundary = True
+        else:
+            boundary = not self._seen_heading and bool(self.LEAD_IN.match(line))
+        if boundary and len(current) >= self.min_chars:
+            completed = current
+            self._section = []
+        self._section.append(line)
+        return completed
+
+def section_score(feedback: str) -> Optional[float]:
+    """Extract the "Score: N/10" rating from a section validation"""
+    match = SCORE_PATTERN.search(feedback)
+    return float(match.group(1)) if match else None
+
+class PlanValidation:
+    """Validate plan sections concurrently while the plan streams in
+    
+    One instance belongs to a single request. With candidates > 1, that many
+    plans are generated in parallel at increasing temperatures and the one
+    with the best average section score is kept.
+    """
+    
+    def __init__(self, feedback_agent, query: str, candidates: int = 1,
+                 temperature_step: float = 0.2, max_validators: int = 4):
+        self.feedback_agent = feedback_agent
+        self.query = query
+        self.candidates = max(1, candidates)
+        self.temperature_step = temperature_step
+        self.max_validators = max_validators
+        self.results: List[Dict] = []
+        self.chosen: Optional[Dict] = None
+        self.timings: Dict[str, float] = {}
+    
+    def run(self, agent, memory, prompt: str, temperature: float, method: str = "default") -> str:
+        """Generate the plan with `agent`, returning the best-validated text"""
+        temperatures = [min(1.0, temperature + i * self.temperature_step) for i in range(self.candidates)]
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_validators) as validators, \
+                ThreadPoolExecutor(max_workers=len(temperatures)) as generators:
+            futures = [
+                profiling.submit(generators, self._generate_candidate, agent, memory, prompt, t, method, validators)
+                for t in temperatures
+            ]
+            self.results = [future.result() for future in futures]
+            generated = time.perf_counter()
+            
+            for result in self.results:
+                result['feedback'] = [future.result() for future in result.pop('pending')]
+                scores = [s for s in map(section_score, result['feedback']) if s is not None]
+                result['score'] = sum(scores) / len(scores) if scores else None
+        finished = time.perf_counter()
+        
+        self.timings = {
+            'generation': generated - start,
+            'total': finished - start,
+            'validation_overhead': finished - generated,
+        }
+        # max() keeps the first candidate on ties, i.e. the base temperature
+        self.chosen = max(self.results, key=lambda r: r['score'] if r['score'] is not None else -1)
+        
+        sections = sum(len(r['feedback']) for r in self.results)
+        memory.add(self.feedback_agent.name,
+                   f"✅ Validated {sections} plan sections while streaming "
+                   f"(+{self.timings['validation_overhead']:.2f}s over generation)")
+        return self.chosen['text']
+    
+    def _generate_candidate(self, agent, memory, prompt: str, temperature: float, method: str, validators) -> Dict:
+        """Stream one candidate plan, handing each finished section to a validator"""
+        splitter = SectionSplitter()
+        chunks, pending = [], []
+        
+        def validate(section):
+            pending.append(profiling.submit(validators, self.feedback_agent.validate_section,
+                                           memory, section, self.query))
+        
+        for chunk in agent._stream_llm_call(memory, prompt, temperature=temperature, method=method):
+            chunks.append(chunk)
+            for section in splitter.feed(chunk):
+                validate(section)
+        tail = splitter.flush()
+        if tail:
+            validate(tail)
+        
+        return {'temperature': temperature, 'text': "".join(chunks).strip(), 'pending': pending}
+    
+    def report(self) -> str:
+        """Markdown summary of the chosen plan's validation"""
+        if not self.chosen:
+            return ""
+        
+        score = self.chosen['score']
+        lines = ["### ✅ Plan Validation"]
+        summary = f"Average section score: {score:.1f}/10" if score is not None else "No section scores returned"
+        if self.candidates > 1:
+            summary = f"Best of {self.candidates} candidates (temperature {self.chosen['temperature']:.1f}). {summary}"
+        lines.append(f"*{summary}; validation added {self.timings['validation_overhead']:.2f}s after generation.*")
+        lines.append("")
+        for i, feedback in enumerate(self.chosen['feedback'], 1):
+            lines.append(f"- **Section {i}:** {' '.join(feedback.split())}")
+        return "\n".join(lines)